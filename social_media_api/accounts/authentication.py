@@ -0,0 +1,197 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+# Changed with queryset .update() (no signal fires), so they are never cached
+# with the user: a cached user has them deferred, read from the database on access.
+COUNTER_FIELDS = ('followers_count', 'following_count', 'posts_count')
+
+
+class LocalTokenCache:
+    """Bounded in-process LRU of token key -> Token (with its user), with a TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._keys_by_user[token.user_id] = key
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            key = self._keys_by_user.get(user_id)
+            if key is not None:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._keys_by_user.get(entry[0].user_id) == key:
+            del self._keys_by_user[entry[0].user_id]
+
+
+class DjangoTokenCache:
+    """The same interface on top of one of the project's CACHES aliases."""
+
+    prefix = 'tokenauth'
+
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(f'{self.prefix}:key:{key}')
+
+    def set(self, key, token):
+        self.cache.set_many({
+            f'{self.prefix}:key:{key}': token,
+            f'{self.prefix}:user:{token.user_id}': key,
+        }, self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(f'{self.prefix}:key:{key}')
+
+    def delete_user(self, user_id):
+        key = self.cache.get(f'{self.prefix}:user:{user_id}')
+        if key is not None:
+            self.cache.delete_many([f'{self.prefix}:key:{key}', f'{self.prefix}:user:{user_id}'])
+
+    def clear(self):
+        # Entries expire on their own; nothing else in the shared cache is ours to flush.
+        pass
+
+
+class TokenCache:
+    """
+    Front for whichever backend is configured, with hit/miss counters.
+
+    TOKEN_AUTH_CACHE_ALIAS selects a Django cache alias (shared across workers);
+    when it is unset, a per-process LocalTokenCache is used instead. That is only
+    safe with a single worker: a revoked token or deactivated user is dropped from
+    the cache of the process that handled the change, and other processes keep
+    accepting it for up to TOKEN_AUTH_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            ttl = getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+            alias = getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None)
+            if alias:
+                self._backend = DjangoTokenCache(alias, ttl)
+            else:
+                self._backend = LocalTokenCache(getattr(settings, 'TOKEN_AUTH_CACHE_MAX_SIZE', 10000), ttl)
+        return self._backend
+
+    def get(self, key):
+        token = self.backend.get(key)
+        with self._lock:
+            if token is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return token
+
+    def set(self, key, token):
+        self.backend.set(key, _without_counters(token))
+
+    def invalidate(self, key):
+        self.backend.delete(key)
+
+    def invalidate_user(self, user_id):
+        self.backend.delete_user(user_id)
+
+    def reset(self):
+        """Drop cached entries, counters and the backend choice (used by tests)."""
+        if self._backend is not None:
+            self._backend.clear()
+        self._backend = None
+        self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.backend) if isinstance(self.backend, LocalTokenCache) else None,
+        }
+
+
+token_cache = TokenCache()
+
+
+def _without_counters(token):
+    user = copy.copy(token.user)
+    for name in COUNTER_FIELDS:
+        user.__dict__.pop(name, None)
+    token = copy.copy(token)
+    token.user = user
+    return token
+
+
+def refresh_counters(user):
+    """Load a cached user's counters with one query (instead of one per counter)."""
+    deferred = user.get_deferred_fields().intersection(COUNTER_FIELDS)
+    if deferred:
+        user.refresh_from_db(fields=sorted(deferred))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication that skips the Token+User join
+    when the key has been seen recently. Entries are dropped when the token is
+    deleted or rotated and whenever the user is saved (e.g. deactivated); see
+    accounts.signals. The user's counters are not cached (COUNTER_FIELDS).
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is not None:
+            # Hand each request its own user instance; the cached one is shared.
+            return (copy.copy(token.user), token)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, token)
+        return (user, token)
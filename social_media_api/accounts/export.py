@@ -0,0 +1,103 @@
+"""
+Account takeout as NDJSON: one JSON object per line, tagged with a "type".
+
+Every table is read with .values().iterator(chunk_size=...), and lines are
+handed on in buffers of about BUFFER_SIZE bytes, so memory stays flat however
+large the account is. gzip_stream() compresses the same stream incrementally,
+and async_stream() hands it to an ASGI server one chunk at a time.
+
+The whole export is read in one transaction, so it is a snapshot: a post
+archived halfway through shows up once, and the user's counters agree with the
+rows. That transaction stays open for as long as the client takes to download;
+with SQLite this relies on WAL mode (see DATABASES) so writers do not wait.
+"""
+import datetime
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from posts.models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post
+
+from .models import Follow
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+USER_FIELDS = ('id', 'username', 'email', 'bio', 'date_joined',
+               'followers_count', 'following_count', 'posts_count')
+POST_FIELDS = ('id', 'title', 'content', 'created_at', 'updated_at', 'like_count', 'comment_count')
+COMMENT_FIELDS = ('id', 'post_id', 'parent_id', 'content', 'created_at', 'updated_at')
+LIKE_FIELDS = ('id', 'post_id', 'created_at')
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder rounds to milliseconds; keep the stored precision.
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def export_records(user, chunk_size=CHUNK_SIZE):
+    """Yield (type, dict) for everything `user` owns, table by table, from one snapshot."""
+    sources = (
+        ('post', Post.objects.filter(author=user), POST_FIELDS, {}),
+        ('post', ArchivedPost.objects.filter(author=user), POST_FIELDS, {'archived': True}),
+        ('comment', Comment.objects.filter(author=user), COMMENT_FIELDS, {}),
+        ('comment', ArchivedComment.objects.filter(author=user), COMMENT_FIELDS, {'archived': True}),
+        ('like', Like.objects.filter(user=user), LIKE_FIELDS, {}),
+        ('like', ArchivedLike.objects.filter(user=user), LIKE_FIELDS, {'archived': True}),
+        ('following', Follow.objects.filter(follower=user), ('followee_id', 'created_at'), {}),
+        ('follower', Follow.objects.filter(followee=user), ('follower_id', 'created_at'), {}),
+    )
+    with transaction.atomic():
+        yield 'user', type(user).objects.filter(pk=user.pk).values(*USER_FIELDS).get()
+        for kind, queryset, fields, extra in sources:
+            for row in queryset.order_by('pk').values(*fields).iterator(chunk_size=chunk_size):
+                yield kind, dict(row, **extra)
+
+
+def ndjson_stream(user, chunk_size=CHUNK_SIZE):
+    """Yield the export as UTF-8 NDJSON in buffers of roughly BUFFER_SIZE bytes."""
+    encoder = ExportEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = []
+    size = 0
+    for kind, record in export_records(user, chunk_size):
+        line = (encoder.encode({'type': kind, **record}) + '\n').encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_stream(chunks, level=6):
+    """gzip-compress an iterable of bytes incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def async_stream(chunks):
+    """
+    Iterate a sync stream from an async one, a chunk per thread hop. Given a sync
+    iterator, StreamingHttpResponse under ASGI would read it all into a list first.
+    """
+    chunks = iter(chunks)
+    done = object()
+    next_chunk = sync_to_async(next)  # Thread-sensitive: every chunk on the request's thread.
+    try:
+        while (chunk := await next_chunk(chunks, done)) is not done:
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            # Ends the export's transaction on the thread holding its connection.
+            await sync_to_async(close)()
@@ -0,0 +1,11 @@
+"""
+Password hashing for import_users' worker processes.
+
+Kept free of model imports so that workers started with the "spawn" method can
+unpickle hash_passwords without the app registry being ready.
+"""
+from django.contrib.auth.hashers import make_password
+
+
+def hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
@@ -0,0 +1,82 @@
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+
+from accounts.storage import ContentAddressedStorage, content_addressed_storage
+
+
+def count_references():
+    """Count database references to each content-addressed blob, across all models."""
+    refs = Counter()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                names = (model._default_manager.exclude(**{field.name: ''})
+                         .exclude(**{f'{field.name}__isnull': True})
+                         .values_list(field.name, flat=True))
+                refs.update(names.iterator(chunk_size=2000))
+    return refs
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed media files (and their variants) that no database row references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Only delete files older than this many seconds, so uploads '
+                                 'whose row is not committed yet survive (default: 3600)')
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+
+    def handle(self, *args, **options):
+        storage = content_addressed_storage()
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        refs = count_references()
+
+        kept = deleted = 0
+        live = set()  # Digests of the blobs that stay.
+        for name in storage.blobs():
+            digest = os.path.splitext(os.path.basename(name))[0]
+            if refs[name]:
+                kept += 1
+                live.add(digest)
+                if refs[name] > 1 and options['verbosity'] >= 2:
+                    self.stdout.write(f"  {name}: {refs[name]} references")
+                continue
+            if storage.get_modified_time(name) > cutoff:
+                live.add(digest)
+                continue
+            deleted += 1
+            if not options['dry_run']:
+                storage.delete(name)
+
+        # Variants (accounts.thumbnails) are named <digest>_<size>.<ext> next to
+        # their blob and go with it.
+        for directory in storage.directories():
+            variants_dir = f"{directory}/variants"
+            if not default_storage.exists(variants_dir):
+                continue
+            for filename in default_storage.listdir(variants_dir)[1]:
+                name = f"{variants_dir}/{filename}"
+                if (filename.rsplit('_', 1)[0] in live
+                        or default_storage.get_modified_time(name) > cutoff):
+                    continue
+                deleted += 1
+                if not options['dry_run']:
+                    default_storage.delete(name)
+
+        # Temp files left behind by interrupted uploads.
+        tmp_dir = f"{storage.prefix}/tmp"
+        if storage.exists(tmp_dir):
+            for filename in storage.listdir(tmp_dir)[1]:
+                name = f"{tmp_dir}/{filename}"
+                if storage.get_modified_time(name) < cutoff and not options['dry_run']:
+                    storage.delete(name)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} unreferenced files, kept {kept}"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.export import CHUNK_SIZE, gzip_stream, ndjson_stream
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Stream one user's posts, comments, likes and follows as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output', '-o', default='-',
+                            help='File to write (default: stdout)')
+        parser.add_argument('--gzip', action='store_true', help='gzip-compress the output')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Rows fetched per database round trip (default: {CHUNK_SIZE})')
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(username=options['username'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        chunks = ndjson_stream(user, chunk_size=options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_stream(chunks)
+
+        if options['output'] == '-':
+            binary = getattr(self.stdout, 'buffer', None)
+            if binary is None and options['gzip']:
+                raise CommandError("--gzip needs --output or a binary stdout")
+            for chunk in chunks:
+                if binary is not None:
+                    binary.write(chunk)
+                else:
+                    self.stdout.write(chunk.decode(), ending='')
+            if binary is not None:
+                binary.flush()
+        else:
+            with open(options['output'], 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported {user.username} to {options['output']}"))
@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from accounts.hashing import hash_passwords
+from accounts.models import CustomUser
+from accounts.search import index_users
+
+
+def read_rows(path, fmt):
+    """Yield one dict per input record without loading the whole file."""
+    with open(path, newline='', encoding='utf-8') as fh:
+        if fmt == 'csv':
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Import users (username, email, password, bio) from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or JSONL with one object per line')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: guessed from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users inserted per bulk_create (default: 1000)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Processes used for password hashing (default: all cores)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        self.verbosity = options['verbosity']
+        batch_size = options['batch_size']
+        workers = max(1, options['workers'] or 1)
+        chunk = max(1, batch_size // workers)
+        created = skipped = 0
+        started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = None
+            for batch in batched(read_rows(path, fmt), batch_size):
+                # Hash this batch in the pool while the previous one is written.
+                passwords = [row.get('password') or None for row in batch]
+                hashing = [pool.submit(hash_passwords, passwords[i:i + chunk])
+                           for i in range(0, len(passwords), chunk)]
+                if pending is not None:
+                    c, s = self._insert(*pending)
+                    created, skipped = created + c, skipped + s
+                pending = (batch, hashing)
+            if pending is not None:
+                c, s = self._insert(*pending)
+                created, skipped = created + c, skipped + s
+
+        elapsed = time.monotonic() - started
+        rate = (created + skipped) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} users, skipped {skipped} in {elapsed:.1f}s ({rate:.0f} rows/sec)"))
+
+    def _insert(self, batch, hashing):
+        hashed = [h for future in hashing for h in future.result()]
+        usernames = [row.get('username') for row in batch]
+        existing = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        users, seen = [], set()
+        for row, password in zip(batch, hashed):
+            username = row.get('username')
+            if not username or username in existing or username in seen:
+                continue
+            seen.add(username)
+            users.append(CustomUser(username=username, email=row.get('email', ''),
+                                    bio=row.get('bio', ''), password=password))
+
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users)
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+            # bulk_create skips post_save, so index the new users for search here.
+            index_users(users)
+
+        if self.verbosity >= 2:
+            self.stdout.write(f"  batch: {len(users)} created, {len(batch) - len(users)} skipped")
+        return len(users), len(batch) - len(users)
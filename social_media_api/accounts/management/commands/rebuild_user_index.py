@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from accounts.models import CustomUser
+from accounts.search import TABLE, index_users
+from social_media_api import fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text user search index from the user table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Users indexed per transaction (default: 2000)')
+
+    def handle(self, *args, **options):
+        if not fts.fts5_available():
+            raise CommandError("User search needs SQLite with FTS5.")
+
+        with connection.cursor() as c:
+            c.execute(f'DELETE FROM {TABLE}')
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            users = list(CustomUser.objects.filter(pk__gt=last_pk).order_by('pk')
+                         .only('pk', 'username', 'bio')[:batch_size])
+            if not users:
+                break
+            with transaction.atomic():
+                index_users(users)
+            total += len(users)
+            last_pk = users[-1].pk
+
+        with connection.cursor() as c:
+            c.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} users"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import CustomUser, Follow
+from posts.models import ArchivedPost, Post
+
+
+def _count(model, field):
+    counts = (model.objects.filter(**{field: OuterRef('pk')})
+              .order_by().values(field).annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute followers_count, following_count and posts_count from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users recomputed per UPDATE (default: 1000)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+
+        # Walk the user table in primary-key order so each UPDATE only locks one chunk.
+        while True:
+            pks = list(CustomUser.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += CustomUser.objects.filter(pk__in=pks).update(
+                    followers_count=_count(Follow, 'followee'),
+                    following_count=_count(Follow, 'follower'),
+                    # Archiving a post leaves its author's count alone (posts.archive).
+                    posts_count=_count(Post, 'author') + _count(ArchivedPost, 'author'),
+                )
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {updated} users"))
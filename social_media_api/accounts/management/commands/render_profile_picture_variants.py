@@ -0,0 +1,32 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from accounts.thumbnails import generate_variants, variant_name, variant_sizes
+
+
+class Command(BaseCommand):
+    help = ("Render the missing variants of every profile picture, e.g. those uploaded before "
+            "variants existed or whose rendering failed")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render variants that already exist (e.g. after changing the sizes or format)')
+
+    def handle(self, *args, **options):
+        storage = CustomUser._meta.get_field('profile_picture').storage
+        names = (CustomUser.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+                 .order_by('profile_picture').values_list('profile_picture', flat=True).distinct())
+        rendered = failed = 0
+        for name in names.iterator():
+            complete = all(default_storage.exists(variant_name(name, size)) for size in variant_sizes())
+            if complete and not options['force']:
+                continue
+            try:
+                generate_variants(name, storage)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Could not render variants for {name}: {exc}")
+                continue
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {rendered} pictures ({failed} failed)"))
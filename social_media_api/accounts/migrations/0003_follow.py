@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_follow_tables(apps, schema_editor):
+    """Fold both legacy self-referential M2M tables into Follow edges."""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Follow = apps.get_model('accounts', 'Follow')
+    db_alias = schema_editor.connection.alias
+
+    # customuser_following: from_customuser follows to_customuser.
+    following = CustomUser.following.through.objects.using(db_alias).values_list(
+        'from_customuser_id', 'to_customuser_id')
+    # customuser_followers: to_customuser follows from_customuser.
+    followers = CustomUser.followers.through.objects.using(db_alias).values_list(
+        'to_customuser_id', 'from_customuser_id')
+
+    edges = {
+        (follower_id, followee_id)
+        for qs in (following, followers)
+        for follower_id, followee_id in qs.iterator(chunk_size=2000)
+        if follower_id != followee_id
+    }
+    Follow.objects.using(db_alias).bulk_create(
+        [Follow(follower_id=follower_id, followee_id=followee_id) for follower_id, followee_id in edges],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_following'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL, verbose_name='Followee')),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL, verbose_name='Follower')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['followee', 'follower'], name='follow_followee_idx')],
+                'constraints': [
+                    models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow_edge'),
+                    models.CheckConstraint(condition=models.Q(('follower', models.F('followee')), _negated=True), name='follow_no_self_follow'),
+                ],
+            },
+        ),
+        migrations.RunPython(merge_follow_tables, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='followers',
+        ),
+        migrations.RemoveField(
+            model_name='customuser',
+            name='following',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following',
+            field=models.ManyToManyField(blank=True, help_text='Users that this user is following.', related_name='followers', through='accounts.Follow', through_fields=('follower', 'followee'), to=settings.AUTH_USER_MODEL),
+        ),
+    ]
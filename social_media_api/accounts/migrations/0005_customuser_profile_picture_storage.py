@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:41
+
+import accounts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_customuser_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=models.ImageField(blank=True, help_text='Upload a profile picture.', null=True, storage=accounts.storage.content_addressed_storage, upload_to='profile_pictures/'),
+        ),
+    ]
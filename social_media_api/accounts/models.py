@@ -1,20 +1,130 @@
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
 
+from .storage import content_addressed_storage
+
 class CustomUser(AbstractUser):
     bio = models.TextField(max_length=500, blank=True, help_text="A short bio about the user.")
-    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null = True,
-                                        help_text="Upload a profile picture.")
-    followers = models.ManyToManyField('self', symmetrical=False, related_name='followed_by',  blank=True,
-                                       help_text="Users who are following this user.")
-    following = models.ManyToManyField('self', symmetrical=False, related_name='following_users', blank=True,
-                                        help_text="Users that this user is following.")
-    groups = models.ManyToManyField('auth.Group', related_name='customuser_set', blank=True, 
+    # Stored by content hash: identical uploads share a file (see accounts.storage).
+    profile_picture = models.ImageField(upload_to='profile_pictures/', storage=content_addressed_storage,
+                                        blank=True, null = True, help_text="Upload a profile picture.")
+    # A single edge table (Follow) backs both directions of the graph:
+    # user.following.all() and user.followers.all() read the same rows.
+    following = models.ManyToManyField('self', symmetrical=False, through='Follow',
+                                       through_fields=('follower', 'followee'),
+                                       related_name='followers', blank=True,
+                                       help_text="Users that this user is following.")
+    # Denormalized counters, kept in step with Follow/Post writes via F() updates.
+    # `manage.py reconcile_counters` recomputes them if they ever drift.
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    groups = models.ManyToManyField('auth.Group', related_name='customuser_set', blank=True,
                                     help_text="The groups this user belongs to.")
     user_permissions = models.ManyToManyField('auth.Permission', related_name='customuser_set', blank=True,
                                               help_text="Specific permissions for this user.")
 
     def __str__(self):
         return self.username
-    
+
+
+# Sent by follow_many(), whose bulk insert fires no post_save, with
+# follower_id and followee_ids (the edges it created).
+follows_created = Signal()
+
+
+class FollowQuerySet(models.QuerySet):
+    def follow(self, follower, followee):
+        """Create the follower -> followee edge. Returns True if it was new."""
+        with transaction.atomic():
+            _, created = self.get_or_create(follower=follower, followee=followee)
+            if created:
+                adjust_follow_counters(follower.pk, [followee.pk], 1)
+        return created
+
+    def unfollow(self, follower, followee):
+        """Delete the follower -> followee edge. Returns True if one existed."""
+        with transaction.atomic():
+            deleted, _ = self.filter(follower=follower, followee=followee).delete()
+            if deleted:
+                adjust_follow_counters(follower.pk, [followee.pk], -1)
+        return bool(deleted)
+
+    def follow_many(self, follower, user_ids):
+        """
+        Follow every existing user in `user_ids` with one lookup and one insert.
+        Returns a {user_id: status} dict.
+        """
+        with transaction.atomic():
+            users = CustomUser.objects.only('pk').in_bulk(user_ids)
+            existing = set(self.filter(follower=follower, followee_id__in=list(users))
+                           .values_list('followee_id', flat=True))
+            new_ids = [pk for pk in users if pk not in existing and pk != follower.pk]
+            # ignore_conflicts covers a concurrent request racing us to the same edge;
+            # any counter overshoot from that race is fixed by reconcile_counters.
+            self.bulk_create([self.model(follower=follower, followee_id=pk) for pk in new_ids],
+                             ignore_conflicts=True)
+            adjust_follow_counters(follower.pk, new_ids, 1)
+            if new_ids:
+                follows_created.send(sender=self.model, follower_id=follower.pk, followee_ids=new_ids)
+
+        results = {}
+        for pk in user_ids:
+            if pk not in users:
+                results[pk] = 'not_found'
+            elif pk == follower.pk:
+                results[pk] = 'cannot_follow_self'
+            elif pk in existing:
+                results[pk] = 'already_following'
+            else:
+                results[pk] = 'followed'
+        return results
+
+    def unfollow_many(self, follower, user_ids):
+        """Delete the edges to every user in `user_ids`. Returns a {user_id: status} dict."""
+        with transaction.atomic():
+            followed = set(self.filter(follower=follower, followee_id__in=user_ids)
+                           .values_list('followee_id', flat=True))
+            self.filter(follower=follower, followee_id__in=followed).delete()
+            adjust_follow_counters(follower.pk, list(followed), -1)
+        return {pk: 'unfollowed' if pk in followed else 'not_following' for pk in user_ids}
+
+
+def adjust_follow_counters(follower_id, followee_ids, delta):
+    """Shift following_count on the follower and followers_count on each followee."""
+    if not followee_ids:
+        return
+    # Clamped at zero: a drifted counter must not trip the unsigned CHECK mid-request.
+    CustomUser.objects.filter(pk=follower_id).update(
+        following_count=Greatest(models.F('following_count') + delta * len(followee_ids), 0))
+    CustomUser.objects.filter(pk__in=followee_ids).update(
+        followers_count=Greatest(models.F('followers_count') + delta, 0))
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='following_edges',
+                                 verbose_name="Follower")
+    followee = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='follower_edges',
+                                 verbose_name="Followee")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    objects = FollowQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also serves "who does X follow" as a range scan on follower.
+            models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow_edge'),
+            models.CheckConstraint(condition=~models.Q(follower=models.F('followee')),
+                                   name='follow_no_self_follow'),
+        ]
+        indexes = [
+            # Reverse direction: "who follows X".
+            models.Index(fields=['followee', 'follower'], name='follow_followee_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower} follows {self.followee}"
+
 # Create your models here.
\ No newline at end of file
@@ -0,0 +1,47 @@
+from .models import Follow
+
+
+class RelationshipMemo:
+    """
+    Follow flags between one viewer and other users, cached for the life of a request.
+
+    prime() loads any ids not seen yet with at most two indexed queries (one per
+    direction of the Follow table), so serializers rendering many user cards can
+    ask for status() one user at a time without issuing a query per card.
+    """
+
+    def __init__(self, viewer):
+        self.viewer = viewer
+        self._loaded = set()
+        self._following = set()
+        self._followed_by = set()
+
+    def prime(self, user_ids):
+        missing = set(user_ids) - self._loaded
+        if not missing:
+            return
+        if self.viewer is not None and self.viewer.is_authenticated:
+            self._following.update(Follow.objects.filter(follower=self.viewer, followee_id__in=missing)
+                                   .values_list('followee_id', flat=True))
+            self._followed_by.update(Follow.objects.filter(followee=self.viewer, follower_id__in=missing)
+                                     .values_list('follower_id', flat=True))
+        self._loaded |= missing
+
+    def status(self, user_id):
+        self.prime([user_id])
+        following = user_id in self._following
+        followed_by = user_id in self._followed_by
+        return {
+            'following': following,
+            'followed_by': followed_by,
+            'mutual': following and followed_by,
+        }
+
+
+def get_relationship_memo(request):
+    """Return the RelationshipMemo attached to `request`, creating it on first use."""
+    memo = getattr(request, '_relationship_memo', None)
+    if memo is None:
+        memo = RelationshipMemo(getattr(request, 'user', None))
+        request._relationship_memo = memo
+    return memo
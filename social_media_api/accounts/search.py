@@ -0,0 +1,34 @@
+"""
+Username/bio search backed by the accounts_user_fts FTS5 table (SQLite only).
+
+The table mirrors CustomUser(username, bio) with rowid = user id. It is kept
+in sync by the signals in accounts.signals and can be rebuilt from scratch
+with `manage.py rebuild_user_index`.
+"""
+from django.db import connection
+
+from social_media_api import fts
+
+TABLE = 'accounts_user_fts'
+# bm25 column weights: a username hit outranks a bio hit.
+WEIGHTS = (10.0, 1.0)
+
+
+def index_users(users):
+    if not fts.fts5_available() or not users:
+        return
+    with connection.cursor() as c:
+        c.executemany(f'INSERT OR REPLACE INTO {TABLE}(rowid, username, bio) VALUES (%s, %s, %s)',
+                      [(user.pk, user.username, user.bio) for user in users])
+
+
+def unindex_user(user_id):
+    if fts.fts5_available():
+        with connection.cursor() as c:
+            c.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [user_id])
+
+
+def search_users(query, cursor=None, limit=20):
+    """Return ([user_id, ...], next_cursor) for a prefix search, best match first."""
+    rows, next_cursor = fts.ranked_search(TABLE, query, weights=WEIGHTS, cursor=cursor, limit=limit)
+    return [row[0] for row in rows], next_cursor
@@ -1,22 +1,51 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
 from rest_framework.authtoken.models import Token
 
+from .thumbnails import variant_urls
+
+
+# Variant URLs are computed, not looked up, so one may 404 for a while (see
+# accounts.thumbnails).
+VARIANTS_HELP = ("Square renders of profile_picture by size. A variant may not exist yet: "
+                 "fall back to profile_picture when it fails to load.")
+
+
+def absolute_variant_urls(user, request=None):
+    urls = variant_urls(user.profile_picture)
+    if urls and request is not None:
+        urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+    return urls
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
     #bio = serializers.CharField()
+    profile_picture_variants = serializers.SerializerMethodField(help_text=VARIANTS_HELP)
+
     class Meta:
         model = get_user_model()
-        fields = ['id', 'username', 'password', 'email', 'bio', 'profile_picture']
-        extra_kwargs = {'password': {'write_only': True}}
-
-    
-    def validate_username(self, value):
-        if get_user_model().objects.filter(username=value).exists():
-            raise serializers.ValidationError("Username is already taken.")
-        return value
-    
+        fields = ['id', 'username', 'password', 'email', 'bio', 'profile_picture', 'profile_picture_variants',
+                  'followers_count', 'following_count', 'posts_count']
+        extra_kwargs = {
+            'password': {'write_only': True},
+            # No UniqueValidator: the unique index on username is checked on insert
+            # instead of with a separate EXISTS query (see _save_unique).
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
+        read_only_fields = ['followers_count', 'following_count', 'posts_count']
+
+    def get_profile_picture_variants(self, obj):
+        return absolute_variant_urls(obj, self.context.get('request'))
+
+    def _save_unique(self, save):
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            raise serializers.ValidationError({'username': ["Username is already taken."]})
+
     def create(self, validated_data):
         # Ensure 'email' and 'bio' are handled correctly
         email = validated_data.get('email')
@@ -25,12 +54,41 @@ class CustomUserSerializer(serializers.ModelSerializer):
         if not email:
             raise serializers.ValidationError("Email is required.")
 
-        user = get_user_model().objects.create_user(
-            username=validated_data['username'],
-            password=validated_data['password'],
-            email=email,
-            bio=bio,
-            profile_picture=validated_data.get('profile_picture', None),
-        )
-        Token.objects.create(user=user)
-        return user
\ No newline at end of file
+        def create_user_and_token():
+            user = get_user_model().objects.create_user(
+                username=validated_data['username'],
+                password=validated_data['password'],
+                email=email,
+                bio=bio,
+                profile_picture=validated_data.get('profile_picture', None),
+            )
+            # Also caches the token on user.auth_token, so the view needs no lookup.
+            Token.objects.create(user=user)
+            return user
+
+        return self._save_unique(create_user_and_token)
+
+    def update(self, instance, validated_data):
+        return self._save_unique(lambda: super(CustomUserSerializer, self).update(instance, validated_data))
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Public, read-only card for listing users (no email or counters beyond followers)."""
+    profile_picture_variants = serializers.SerializerMethodField(help_text=VARIANTS_HELP)
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'bio', 'profile_picture', 'profile_picture_variants', 'followers_count']
+        read_only_fields = fields
+
+    def get_profile_picture_variants(self, obj):
+        return absolute_variant_urls(obj, self.context.get('request'))
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1),
+                                     allow_empty=False, max_length=100)
+
+    def validate_user_ids(self, value):
+        # Drop duplicates but keep the caller's order for the response.
+        return list(dict.fromkeys(value))
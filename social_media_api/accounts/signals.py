@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import Follow
+from .search import index_users, unindex_user
+from .thumbnails import schedule_variants
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers deactivation (is_active=False) as well as any other profile change.
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def release_follow_counters(sender, instance, **kwargs):
+    # The user's Follow rows go with it by CASCADE, which bypasses the counters.
+    users = get_user_model().objects
+    users.filter(pk__in=Follow.objects.filter(follower=instance).values('followee')).update(
+        followers_count=Greatest(F('followers_count') - 1, 0))
+    users.filter(pk__in=Follow.objects.filter(followee=instance).values('follower')).update(
+        following_count=Greatest(F('following_count') - 1, 0))
+
+
+@receiver(pre_save, sender=get_user_model())
+def note_profile_picture_upload(sender, instance, **kwargs):
+    # An uncommitted FieldFile means a new file is about to be written by this save.
+    picture = instance.profile_picture
+    instance._profile_picture_uploaded = bool(picture) and not picture._committed
+
+
+@receiver(post_save, sender=get_user_model())
+def render_profile_picture_variants(sender, instance, **kwargs):
+    if getattr(instance, '_profile_picture_uploaded', False):
+        instance._profile_picture_uploaded = False
+        schedule_variants(instance.profile_picture)
+
+
+@receiver(post_save, sender=get_user_model())
+def index_user_for_search(sender, instance, update_fields=None, **kwargs):
+    # Saves such as the last_login update on login don't touch indexed columns.
+    if update_fields is None or {'username', 'bio'} & set(update_fields):
+        index_users([instance])
+
+
+@receiver(post_delete, sender=get_user_model())
+def unindex_user_for_search(sender, instance, **kwargs):
+    unindex_user(instance.pk)
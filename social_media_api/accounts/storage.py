@@ -0,0 +1,74 @@
+"""
+Content-addressed storage for user uploads.
+
+Files are stored by the SHA-256 of their bytes (cas/ab/cd/<digest>.<ext>), so
+identical uploads share one file and every URL is immutable and can be cached
+forever. Files are never deleted on replace; `manage.py collect_media_garbage`
+counts references from the database and removes blobs nothing points at, along
+with their rendered variants (cas/ab/cd/variants/, see accounts.thumbnails).
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    prefix = 'cas'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once the content has been hashed in _save.
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = self.path(os.path.join(self.prefix, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        # Hash while streaming to a temp file so uploads are never held in memory.
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        final_name = f"{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+        final_path = self.path(final_name)
+
+        if os.path.exists(final_path):
+            os.remove(tmp.name)  # Same bytes already stored.
+            # Touch it so garbage collection, which spares blobs younger than
+            # --min-age, can't delete an orphan this upload is about to reference.
+            os.utime(final_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp.name, final_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(final_path, self.file_permissions_mode)
+        return final_name
+
+    def directories(self):
+        """Yield every cas/ab/cd directory."""
+        if not self.exists(self.prefix):
+            return
+        for first in self.listdir(self.prefix)[0]:
+            if first == 'tmp':
+                continue
+            for second in self.listdir(f"{self.prefix}/{first}")[0]:
+                yield f"{self.prefix}/{first}/{second}"
+
+    def blobs(self):
+        """Yield the name of every stored blob."""
+        for directory in self.directories():
+            for filename in self.listdir(directory)[1]:
+                yield f"{directory}/{filename}"
+
+
+def content_addressed_storage():
+    return ContentAddressedStorage()
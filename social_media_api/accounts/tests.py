@@ -1,3 +1,576 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from posts.models import Comment, Like, Post
+
+from .authentication import token_cache
+from .export import export_records
+from .models import Follow
+
+User = get_user_model()
+
+
+class FollowAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_follow_writes_single_edge(self):
+        resp = self.client.post(f'/accounts/follow/{self.bob.pk}/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(list(self.alice.following.all()), [self.bob])
+        self.assertEqual(list(self.bob.followers.all()), [self.alice])
+
+    def test_follow_twice_is_idempotent(self):
+        self.client.post(f'/accounts/follow/{self.bob.pk}/')
+        self.client.post(f'/accounts/follow/{self.bob.pk}/')
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_cannot_follow_self(self):
+        resp = self.client.post(f'/accounts/follow/{self.alice.pk}/')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unfollow_removes_edge(self):
+        Follow.objects.follow(self.alice, self.bob)
+        resp = self.client.post(f'/accounts/unfollow/{self.bob.pk}/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_unknown_user_returns_404(self):
+        resp = self.client.post('/accounts/follow/9999/')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CounterTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_follow_and_unfollow_adjust_counters(self):
+        self.client.post(f'/accounts/follow/{self.bob.pk}/')
+        self.client.post(f'/accounts/follow/{self.bob.pk}/')
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.followers_count), (1, 1))
+
+        self.client.delete(f'/accounts/follow/{self.bob.pk}/')
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.followers_count), (0, 0))
+
+    def test_decrements_stop_at_zero(self):
+        Follow.objects.follow(self.alice, self.bob)
+        post = Post.objects.create(author=self.alice, title='Hello', content='World')
+        User.objects.update(followers_count=0, following_count=0, posts_count=0)  # Drifted.
+        Follow.objects.unfollow(self.alice, self.bob)
+        post.delete()
+        self.alice.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.alice.posts_count), (0, 0))
+
+    def test_deleting_a_user_releases_its_follow_edges(self):
+        carol = User.objects.create_user(username='carol', password='testpass123')
+        Follow.objects.follow(self.bob, self.alice)
+        Follow.objects.follow(carol, self.bob)
+        self.bob.delete()
+        self.alice.refresh_from_db()
+        carol.refresh_from_db()
+        self.assertEqual((self.alice.followers_count, carol.following_count), (0, 0))
+
+    def test_post_create_and_delete_adjust_posts_count(self):
+        post = Post.objects.create(author=self.alice, title='Hello', content='World')
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.posts_count, 1)
+        post.delete()
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.posts_count, 0)
+
+    def test_profile_exposes_counters(self):
+        Follow.objects.follow(self.bob, self.alice)
+        self.alice.refresh_from_db()
+        self.client.force_authenticate(user=self.alice)
+        resp = self.client.get('/accounts/profile/')
+        self.assertEqual(resp.data['followers_count'], 1)
+        self.assertEqual(resp.data['following_count'], 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)  # bypasses the counters
+        Post.objects.create(author=self.bob, title='t', content='c')
+        User.objects.filter(pk=self.bob.pk).update(posts_count=7)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.alice.following_count, 1)
+        self.assertEqual(self.bob.followers_count, 1)
+        self.assertEqual(self.bob.posts_count, 1)
+
+
+class BulkFollowAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.others = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(5)]
+        self.client.force_authenticate(user=self.alice)
+        self.url = '/accounts/follow/bulk/'
+
+    def test_bulk_follow_reports_per_id_status(self):
+        Follow.objects.follow(self.alice, self.others[0])
+        ids = [u.pk for u in self.others] + [self.alice.pk, 9999]
+        resp = self.client.post(self.url, {'user_ids': ids}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        statuses = {r['id']: r['status'] for r in resp.data['results']}
+        self.assertEqual(statuses[self.others[0].pk], 'already_following')
+        self.assertEqual(statuses[self.others[1].pk], 'followed')
+        self.assertEqual(statuses[self.alice.pk], 'cannot_follow_self')
+        self.assertEqual(statuses[9999], 'not_found')
+        self.assertEqual(Follow.objects.filter(follower=self.alice).count(), 5)
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.following_count, 5)
+
+    def test_bulk_follow_query_count_is_constant(self):
+        ids = [u.pk for u in self.others]
+        # savepoint + in_bulk + existing edges + insert + 2 counter updates + release
+        with self.assertNumQueries(7):
+            Follow.objects.follow_many(self.alice, ids)
+
+    @override_settings(FEED_FANOUT_ASYNC=False)
+    def test_bulk_follow_backfills_the_timeline(self):
+        post = Post.objects.create(author=self.others[1], title='Hello', content='...')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.follow_many(self.alice, [u.pk for u in self.others])
+        self.assertEqual([p['id'] for p in self.client.get('/posts/feed/').data['results']], [post.pk])
+
+    def test_bulk_unfollow(self):
+        Follow.objects.follow_many(self.alice, [u.pk for u in self.others])
+        resp = self.client.delete(self.url, {'user_ids': [self.others[0].pk, 9999]}, format='json')
+        statuses = {r['id']: r['status'] for r in resp.data['results']}
+        self.assertEqual(statuses, {self.others[0].pk: 'unfollowed', 9999: 'not_following'})
+        self.others[0].refresh_from_db()
+        self.assertEqual(self.others[0].followers_count, 0)
+
+    def test_bulk_follow_rejects_empty_list(self):
+        resp = self.client.post(self.url, {'user_ids': []}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RelationshipStatusAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.carol = User.objects.create_user(username='carol', password='testpass123')
+        self.dave = User.objects.create_user(username='dave', password='testpass123')
+        Follow.objects.follow(self.alice, self.bob)
+        Follow.objects.follow(self.bob, self.alice)
+        Follow.objects.follow(self.alice, self.carol)
+        Follow.objects.follow(self.dave, self.alice)
+        self.client.force_authenticate(user=self.alice)
+
+    def test_flags_for_many_users(self):
+        ids = [self.bob.pk, self.carol.pk, self.dave.pk]
+        resp = self.client.get('/accounts/relationships/', {'ids': ','.join(map(str, ids))})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        flags = {r['id']: (r['following'], r['followed_by'], r['mutual']) for r in resp.data['results']}
+        self.assertEqual(flags[self.bob.pk], (True, True, True))
+        self.assertEqual(flags[self.carol.pk], (True, False, False))
+        self.assertEqual(flags[self.dave.pk], (False, True, False))
+
+    def test_memo_uses_two_queries_and_caches(self):
+        from .relationships import RelationshipMemo
+        memo = RelationshipMemo(self.alice)
+        with self.assertNumQueries(2):
+            memo.prime([self.bob.pk, self.carol.pk, self.dave.pk])
+        with self.assertNumQueries(0):
+            memo.status(self.bob.pk)
+
+    def test_rejects_bad_ids(self):
+        resp = self.client.get('/accounts/relationships/', {'ids': 'a,b'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def use_private_shared_cache(test):
+    """Point the 'shared' cache at a temporary directory: the real one is the deployment's."""
+    cache_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, cache_dir)
+    shared = dict(settings.CACHES['shared'], LOCATION=cache_dir)
+    override = override_settings(CACHES=dict(settings.CACHES, shared=shared))
+    override.enable()
+    test.addCleanup(override.disable)
+    test.addCleanup(token_cache.reset)
+    token_cache.reset()
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        use_private_shared_cache(self)
+        self.user = User.objects.create_user(username='alice', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_lookup(self):
+        self.client.get('/accounts/profile/')
+        with self.assertNumQueries(1):  # The counters, which are never cached.
+            resp = self.client.get('/accounts/profile/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/accounts/profile/')
+        self.user.is_active = False
+        self.user.save()
+        resp = self.client.get('/accounts/profile/')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get('/accounts/profile/')
+        self.token.delete()
+        resp = self.client.get('/accounts/profile/')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_in_another_worker_is_seen(self):
+        from .authentication import TokenCache
+        self.client.get('/accounts/profile/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        TokenCache().invalidate_user(self.user.pk)  # What that worker's signal handler does.
+        resp = self.client.get('/accounts/profile/')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_counters_are_read_fresh(self):
+        self.client.get('/accounts/profile/')
+        User.objects.filter(pk=self.user.pk).update(followers_count=5)
+        resp = self.client.get('/accounts/profile/')
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(resp.data['followers_count'], 5)
+
+    def test_shared_cache_does_not_evict_active_tokens(self):
+        # Two entries per token: Django's default MAX_ENTRIES of 300 culled at random
+        # past about 150 users.
+        entries = {f'tokenauth:key:{n}': n for n in range(1000)}
+        caches['shared'].set_many(entries)
+        self.assertEqual(caches['shared'].get_many(entries), entries)
+
+    def test_lru_evicts_oldest_entry(self):
+        from .authentication import LocalTokenCache
+        cache = LocalTokenCache(max_size=1, ttl=60)
+        other = Token.objects.create(user=User.objects.create_user(username='bob', password='testpass123'))
+        cache.set(self.token.key, self.token)
+        cache.set(other.key, other)
+        self.assertIsNone(cache.get(self.token.key))
+        self.assertEqual(cache.get(other.key), other)
+
+
+class ImportUsersCommandTestCase(APITestCase):
+    def _write(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_imports_jsonl_with_tokens(self):
+        User.objects.create_user(username='existing', password='testpass123')
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'pw12345!'} for i in range(5)]
+        rows.append({'username': 'existing', 'password': 'x'})
+        path = self._write('.jsonl', '\n'.join(json.dumps(r) for r in rows))
+
+        out = StringIO()
+        call_command('import_users', path, batch_size=2, workers=2, stdout=out)
+
+        self.assertIn('Imported 5 users, skipped 1', out.getvalue())
+        user = User.objects.get(username='user3')
+        self.assertTrue(user.check_password('pw12345!'))
+        self.assertTrue(Token.objects.filter(user=user).exists())
+
+    def test_imports_csv(self):
+        path = self._write('.csv', 'username,email,password,bio\ncsvuser,c@example.com,pw12345!,hello\n')
+        call_command('import_users', path, workers=1, stdout=StringIO())
+        self.assertEqual(User.objects.get(username='csvuser').bio, 'hello')
+
+
+class RegistrationAPITestCase(APITestCase):
+    url = '/accounts/register/'
+    payload = {'username': 'newbie', 'password': 'pw12345!', 'email': 'newbie@example.com'}
+
+    def test_register_returns_token(self):
+        resp = self.client.post(self.url, self.payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['token'], Token.objects.get(user__username='newbie').key)
+
+    def test_register_only_writes(self):
+        # The old path also ran two username EXISTS checks and re-read the token.
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, self.payload, format='json')
+        statements = [re.sub(r'^\d+ times: ', '', q['sql']) for q in queries.captured_queries]
+        self.assertFalse([sql for sql in statements if sql.startswith('SELECT')])
+        inserts = [re.match(r'INSERT (?:OR REPLACE )?INTO "?(\w+)', sql)[1]
+                   for sql in statements if sql.startswith('INSERT')]
+        self.assertEqual(inserts, ['accounts_customuser', 'accounts_user_fts', 'authtoken_token'])
+        # All in one savepoint.
+        self.assertEqual(len([sql for sql in statements if sql.startswith('SAVEPOINT')]), 1)
+
+    def test_duplicate_username_is_rejected_by_constraint(self):
+        User.objects.create_user(username='newbie', password='testpass123')
+        resp = self.client.post(self.url, self.payload, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', resp.data)
+        self.assertEqual(Token.objects.count(), 0)
+
+    def test_profile_update_to_taken_username(self):
+        User.objects.create_user(username='taken', password='testpass123')
+        user = User.objects.create_user(username='mine', password='testpass123')
+        self.client.force_authenticate(user=user)
+        resp = self.client.put('/accounts/profile/', {'username': 'taken'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProfilePictureVariantsTestCase(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root, PROFILE_PICTURE_VARIANT_FORMAT='JPEG')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _upload(self):
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_schedules_variants_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            user = User.objects.create_user(username='alice', password='testpass123',
+                                            profile_picture=self._upload())
+        self.assertEqual(len(callbacks), 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.bio = 'no new upload'
+            user.save()
+        self.assertEqual(callbacks, [])
+
+    def test_generate_variants_writes_deterministic_names(self):
+        from .thumbnails import generate_variants, variant_name
+        with self.captureOnCommitCallbacks():
+            user = User.objects.create_user(username='alice', password='testpass123',
+                                            profile_picture=self._upload())
+        picture = user.profile_picture
+        generate_variants(picture.name, picture.storage)
+
+        target = variant_name(picture.name, 96)
+        digest = os.path.splitext(os.path.basename(picture.name))[0]
+        self.assertEqual(target, f'{os.path.dirname(picture.name)}/variants/{digest}_96.jpg')
+        with default_storage.open(target) as fh:
+            self.assertEqual(Image.open(fh).size, (96, 96))
+
+    def test_backfill_command_renders_missing_variants(self):
+        from .thumbnails import variant_name
+        with self.captureOnCommitCallbacks():  # Never run, as for pictures from before variants.
+            user = User.objects.create_user(username='alice', password='testpass123',
+                                            profile_picture=self._upload())
+        target = variant_name(user.profile_picture.name, 48)
+        self.assertFalse(default_storage.exists(target))
+
+        out = StringIO()
+        call_command('render_profile_picture_variants', stdout=out)
+        self.assertIn('Rendered variants for 1 pictures', out.getvalue())
+        self.assertTrue(default_storage.exists(target))
+
+        out = StringIO()
+        call_command('render_profile_picture_variants', stdout=out)
+        self.assertIn('Rendered variants for 0 pictures', out.getvalue())
+
+    def test_serializer_exposes_variant_urls(self):
+        with self.captureOnCommitCallbacks():
+            user = User.objects.create_user(username='alice', password='testpass123',
+                                            profile_picture=self._upload())
+        self.client.force_authenticate(user=user)
+        variants = self.client.get('/accounts/profile/').data['profile_picture_variants']
+        self.assertEqual(set(variants), {'48', '96', '256'})
+        self.assertTrue(variants['48'].startswith('http://testserver/media/cas/'))
+        self.assertTrue(variants['48'].endswith('_48.jpg'))
+
+
+@override_settings(PROFILE_PICTURE_VARIANT_FORMAT='JPEG')
+class ContentAddressedStorageTestCase(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _create(self, username, data=b'same bytes'):
+        with self.captureOnCommitCallbacks():
+            return User.objects.create_user(username=username, password='testpass123',
+                                            profile_picture=SimpleUploadedFile('pic.PNG', data))
+
+    def test_identical_uploads_share_one_file(self):
+        alice = self._create('alice')
+        bob = self._create('bob')
+        self.assertEqual(alice.profile_picture.name, bob.profile_picture.name)
+        self.assertRegex(alice.profile_picture.name, r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        storage = alice.profile_picture.storage
+        self.assertEqual(list(storage.blobs()), [alice.profile_picture.name])
+
+    def test_garbage_collection_keeps_referenced_files(self):
+        alice = self._create('alice')
+        bob = self._create('bob', data=b'other bytes')
+        orphan = bob.profile_picture.name
+        User.objects.filter(pk=bob.pk).update(profile_picture='')
+
+        call_command('collect_media_garbage', min_age=0, stdout=StringIO())
+
+        storage = alice.profile_picture.storage
+        self.assertTrue(storage.exists(alice.profile_picture.name))
+        self.assertFalse(storage.exists(orphan))
+
+    def test_reupload_of_an_old_orphan_is_not_collected(self):
+        bob = self._create('bob')
+        orphan = bob.profile_picture.name
+        User.objects.filter(pk=bob.pk).update(profile_picture='')
+        storage = bob.profile_picture.storage
+        os.utime(storage.path(orphan), (0, 0))
+
+        # Saved, but the row referencing it is not committed yet.
+        self.assertEqual(storage.save('pic.png', ContentFile(b'same bytes')), orphan)
+        call_command('collect_media_garbage', min_age=3600, stdout=StringIO())
+        self.assertTrue(storage.exists(orphan))
+
+    def test_garbage_collection_removes_variants_of_deleted_blobs(self):
+        from .thumbnails import variant_name
+        alice = self._create('alice')
+        bob = self._create('bob', data=b'other bytes')
+        for user in (alice, bob):
+            default_storage.save(variant_name(user.profile_picture.name, 48), ContentFile(b'variant'))
+        User.objects.filter(pk=bob.pk).update(profile_picture='')
+
+        call_command('collect_media_garbage', min_age=0, stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(variant_name(alice.profile_picture.name, 48)))
+        self.assertFalse(default_storage.exists(variant_name(bob.profile_picture.name, 48)))
+
+
+class UserSearchAPITestCase(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer', password='testpass123')
+        self.alice = User.objects.create_user(username='alice', password='testpass123', bio='Gardener')
+        self.alina = User.objects.create_user(username='alina', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123', bio='Friend of alice')
+        self.client.force_authenticate(user=self.viewer)
+
+    def search(self, q, **params):
+        return self.client.get('/accounts/search/', {'q': q, **params})
+
+    def test_prefix_search_ranks_username_over_bio(self):
+        resp = self.search('alic')
+        usernames = [u['username'] for u in resp.data['results']]
+        self.assertEqual(usernames, ['alice', 'bob'])
+        self.assertNotIn('email', resp.data['results'][0])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.bob.bio = 'Botanist'
+        self.bob.save()
+        self.assertEqual([u['username'] for u in self.search('botan').data['results']], ['bob'])
+        self.bob.delete()
+        self.assertEqual(self.search('botan').data['results'], [])
+
+    def test_keyset_pagination(self):
+        from .views import UserSearchView
+        patcher = mock.patch.object(UserSearchView, 'page_size', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        first = self.search('ali')
+        second = self.search('ali', cursor=first.data['next'])
+        third = self.search('ali', cursor=second.data['next'])
+        seen = [r['username'] for page in (first, second, third) for r in page.data['results']]
+        self.assertEqual(sorted(seen), ['alice', 'alina', 'bob'])
+        self.assertIsNone(third.data['next'])
+
+    def test_rebuild_user_index(self):
+        with connection.cursor() as c:
+            c.execute('DELETE FROM accounts_user_fts')
+        self.assertEqual(self.search('alina').data['results'], [])
+        call_command('rebuild_user_index', batch_size=2, stdout=StringIO())
+        self.assertEqual([u['username'] for u in self.search('alina').data['results']], ['alina'])
+
+    def test_operators_in_query_are_inert(self):
+        resp = self.search('alice OR "bob')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+
+class AccountExportTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123', bio='Hi')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        post = Post.objects.create(author=self.alice, title='Mine', content='...')
+        other = Post.objects.create(author=self.bob, title='Theirs', content='...')
+        Comment.objects.create(post=other, author=self.alice, content='Nice')
+        Like.objects.create(post=other, user=self.alice)
+        Like.objects.create(post=post, user=self.bob)
+        Follow.objects.follow(self.alice, self.bob)
+        Follow.objects.follow(self.bob, self.alice)
+        self.client.force_authenticate(user=self.alice)
+        use_private_shared_cache(self)
+
+    def records(self, data):
+        return [json.loads(line) for line in data.decode().splitlines()]
+
+    def test_streams_ndjson(self):
+        resp = self.client.get('/accounts/export/')
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        records = self.records(b''.join(resp.streaming_content))
+        self.assertEqual([r['type'] for r in records],
+                         ['user', 'post', 'comment', 'like', 'following', 'follower'])
+        self.assertEqual(records[0]['username'], 'alice')
+        self.assertNotIn('password', records[0])
+        self.assertEqual(records[1]['title'], 'Mine')
+        self.assertEqual(records[4]['followee_id'], self.bob.pk)
+
+    async def test_streams_chunk_by_chunk_under_asgi(self):
+        token = await Token.objects.acreate(user=self.alice)
+        resp = await self.async_client.get('/accounts/export/', headers={'Authorization': f'Token {token.key}'})
+        self.assertTrue(resp.is_async)
+        data = b''.join([chunk async for chunk in resp.streaming_content])
+        self.assertEqual(len(self.records(data)), 6)
+
+    def test_gzip(self):
+        resp = self.client.get('/accounts/export/', {'compress': 'gzip'})
+        self.assertEqual(resp['Content-Type'], 'application/gzip')
+        records = self.records(gzip.decompress(b''.join(resp.streaming_content)))
+        self.assertEqual(len(records), 6)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('export_user', 'alice', chunk_size=1, stdout=out)
+        self.assertEqual(len(self.records(out.getvalue().encode())), 6)
+
+    def test_export_is_read_in_one_transaction(self):
+        depth = len(connection.atomic_blocks)
+        records = export_records(self.alice, chunk_size=1)
+        next(records)
+        self.assertEqual(len(connection.atomic_blocks), depth + 1)
+        self.assertEqual(len(list(records)), 5)
+        self.assertEqual(len(connection.atomic_blocks), depth)
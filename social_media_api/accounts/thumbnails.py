@@ -0,0 +1,101 @@
+"""
+Fixed-size variants of CustomUser.profile_picture.
+
+Variants are rendered in a small thread pool after the upload's transaction
+commits, and written to the default storage under deterministic names derived
+from the original's (content-addressed) name:
+
+    cas/ab/cd/<digest>.png -> cas/ab/cd/variants/<digest>_96.webp
+
+so their URLs can be computed without touching storage or the database. That
+also means a URL can point at a file that does not exist yet: until the pool
+gets to a fresh upload, or for pictures uploaded before variants existed (run
+`manage.py render_profile_picture_variants` once to render those). Clients
+fall back to the original `profile_picture` when a variant fails to load.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_sizes():
+    return getattr(settings, 'PROFILE_PICTURE_VARIANT_SIZES', (48, 96, 256))
+
+
+def variant_format():
+    # Fall back to JPEG on Pillow builds without WebP support.
+    fmt = getattr(settings, 'PROFILE_PICTURE_VARIANT_FORMAT', 'WEBP').upper()
+    if fmt == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return fmt
+
+
+def variant_name(name, size):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = 'jpg' if variant_format() == 'JPEG' else variant_format().lower()
+    return f"{directory}/variants/{stem}_{size}.{extension}".lstrip('/')
+
+
+def variant_urls(field_file):
+    """
+    {size: url} for every configured variant of `field_file`, or None if it is
+    empty. The files are not checked for; see the module docstring.
+    """
+    if not field_file:
+        return None
+    return {str(size): default_storage.url(variant_name(field_file.name, size))
+            for size in variant_sizes()}
+
+
+def generate_variants(name, source_storage):
+    """Render all variants of the image `name` in `source_storage`, replacing older renders."""
+    with source_storage.open(name, 'rb') as fh:
+        image = Image.open(fh)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    fmt = variant_format()
+    for size in variant_sizes():
+        buffer = BytesIO()
+        ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS).save(buffer, fmt, quality=82)
+        target = variant_name(name, size)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def _generate_logged(name, storage):
+    try:
+        generate_variants(name, storage)
+    except Exception:
+        logger.exception("Could not render variants for %s", name)
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PROFILE_PICTURE_VARIANT_WORKERS', 2),
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def schedule_variants(field_file):
+    """Queue variant rendering for `field_file` once the current transaction commits."""
+    name, storage = field_file.name, field_file.storage
+    transaction.on_commit(lambda: executor().submit(_generate_logged, name, storage))
@@ -1,7 +1,8 @@
 # accounts/urls.py
 from django.urls import path
 from .views import UserRegistrationView, CustomAuthToken, UserProfileView
-from .views import Follow_User, Unfollow_User
+from .views import Follow_User, Unfollow_User, Bulk_Follow_User, RelationshipStatusView
+from .views import TokenCacheStatsView, UserSearchView, AccountExportView
 
 urlpatterns = [
     # URL for user registration
@@ -16,6 +17,21 @@ urlpatterns = [
     # URL for following a user
     path('follow/<int:pk>/', Follow_User.as_view(), name='follow-user'),
 
+    # URL for following/unfollowing many users at once
+    path('follow/bulk/', Bulk_Follow_User.as_view(), name='bulk-follow-users'),
+
+    # URL for following/mutual flags of many users at once
+    path('relationships/', RelationshipStatusView.as_view(), name='relationship-status'),
+
+    # URL for searching users by username/bio
+    path('search/', UserSearchView.as_view(), name='user-search'),
+
+    # URL for downloading everything the current user owns (NDJSON, optionally gzip)
+    path('export/', AccountExportView.as_view(), name='account-export'),
+
+    # URL for token authentication cache statistics (staff only)
+    path('auth-cache/stats/', TokenCacheStatsView.as_view(), name='token-cache-stats'),
+
     # URL for unfollowing a user
     path('unfollow/<int:pk>/', Unfollow_User.as_view(), name='unfollow-user'),
 ]   
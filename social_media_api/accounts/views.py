@@ -1,25 +1,33 @@
 from django.shortcuts import render
-from rest_framework.serializers import CustomUserSerializer
+from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework import status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework import permissions
-from .models import CustomUser
+from .models import CustomUser, Follow
+from .serializers import CustomUserSerializer, BulkFollowSerializer, UserSummarySerializer
+from .relationships import get_relationship_memo
+from .authentication import refresh_counters, token_cache
+from .search import search_users
+from .export import async_stream, gzip_stream, ndjson_stream
 
 
 
 # View for user registration
 class UserRegistrationView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         serializer = CustomUserSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
             return Response({
                 'user': serializer.data,
-                'token': token.key
+                'token': user.auth_token.key
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -44,37 +52,136 @@ class Follow_User(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user_to_follow = CustomUser.objects.get(pk=kwargs['pk'])
-        request.user.following.add(user_to_follow)
-        user_to_follow.followers.add(request.user)
+        user_to_follow = get_object_or_404(CustomUser, pk=kwargs['pk'])
+        if user_to_follow.pk == request.user.pk:
+            return Response({"error": "You cannot follow yourself."}, status=status.HTTP_400_BAD_REQUEST)
+        Follow.objects.follow(request.user, user_to_follow)
         return Response({"message": "You are now following {}".format(user_to_follow.username)}, status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
-        user_to_unfollow = CustomUser.objects.get(pk=kwargs['pk'])
-        request.user.following.remove(user_to_unfollow)
-        user_to_unfollow.followers.remove(request.user)
+        user_to_unfollow = get_object_or_404(CustomUser, pk=kwargs['pk'])
+        Follow.objects.unfollow(request.user, user_to_unfollow)
         return Response({"message": "You have unfollowed {}".format(user_to_unfollow.username)}, status=status.HTTP_200_OK)
 
 class Unfollow_User(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user_to_unfollow = CustomUser.objects.get(pk=kwargs['pk'])
-        request.user.following.remove(user_to_unfollow)
-        user_to_unfollow.followers.remove(request.user)
+        user_to_unfollow = get_object_or_404(CustomUser, pk=kwargs['pk'])
+        Follow.objects.unfollow(request.user, user_to_unfollow)
         return Response({"message": "You have unfollowed {}".format(user_to_unfollow.username)}, status=status.HTTP_200_OK)
 
+class Bulk_Follow_User(APIView):
+    """
+    Follow (POST) or unfollow (DELETE) up to 100 users in one request.
+    Body: {"user_ids": [1, 2, 3]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        return self._apply(request, Follow.objects.follow_many)
+
+    def delete(self, request, *args, **kwargs):
+        return self._apply(request, Follow.objects.unfollow_many)
+
+    def _apply(self, request, action):
+        serializer = BulkFollowSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = action(request.user, serializer.validated_data['user_ids'])
+        return Response({"results": [{"id": pk, "status": result} for pk, result in results.items()]},
+                        status=status.HTTP_200_OK)
+
+class RelationshipStatusView(APIView):
+    """
+    Follow flags between the current user and up to 100 other users.
+    GET /accounts/relationships/?ids=1,2,3
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            user_ids = list(dict.fromkeys(int(pk) for pk in request.query_params.get('ids', '').split(',') if pk))
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not user_ids or len(user_ids) > self.max_ids:
+            return Response({"error": "Provide between 1 and {} ids.".format(self.max_ids)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        memo = get_relationship_memo(request)
+        memo.prime(user_ids)
+        return Response({"results": [dict(id=pk, **memo.status(pk)) for pk in user_ids]},
+                        status=status.HTTP_200_OK)
+
+class UserSearchView(APIView):
+    """
+    Prefix search over usernames and bios, best match first.
+    GET /accounts/search/?q=ali&cursor=<next from the previous page>
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            user_ids, next_cursor = search_users(query, cursor=request.query_params.get('cursor'),
+                                                 limit=self.page_size)
+        except ValueError:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        users = CustomUser.objects.in_bulk(user_ids)
+        results = [users[pk] for pk in user_ids if pk in users]
+        return Response({
+            "results": UserSummarySerializer(results, many=True, context={'request': request}).data,
+            "next": next_cursor,
+        }, status=status.HTTP_200_OK)
+
+class AccountExportView(APIView):
+    """
+    Stream the current user's posts, comments, likes and follows as NDJSON.
+    GET /accounts/export/?compress=gzip for a gzip-compressed download.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        compress = request.query_params.get('compress')
+        if compress not in (None, '', 'gzip'):
+            return Response({"error": "compress must be 'gzip'."}, status=status.HTTP_400_BAD_REQUEST)
+        chunks = ndjson_stream(request.user)
+        filename = f"{request.user.username}.ndjson"
+        if compress == 'gzip':
+            chunks = gzip_stream(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+        else:
+            content_type = 'application/x-ndjson'
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_stream(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class TokenCacheStatsView(APIView):
+    """Hit/miss counters of the token authentication cache in this process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats(), status=status.HTTP_200_OK)
+
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         user = request.user
-        serializer = CustomUserSerializer(user)
+        refresh_counters(user)
+        serializer = CustomUserSerializer(user, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
         user = request.user
-        serializer = CustomUserSerializer(user, data=request.data, partial=True)
+        refresh_counters(user)
+        serializer = CustomUserSerializer(user, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import claim, queue_depth, requeue_stale, run_job
+from jobs.worker import init_process, run_in_worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued jobs in a pool of worker threads or processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOBS_WORKERS', 4),
+                            help='Pool size; 0 runs jobs in this process (default: JOBS_WORKERS)')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Run jobs in threads (I/O-bound tasks) or processes (default: thread)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Jobs claimed at a time (default: 4 per worker)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when no job is due (default: 1)')
+        parser.add_argument('--report-interval', type=float, default=30.0,
+                            help='Seconds between queue depth reports (default: 30)')
+        parser.add_argument('--stale-after', type=float, default=300.0,
+                            help='Requeue running jobs claimed longer ago than this, in seconds (default: 300)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        workers = max(0, options['workers'])
+        batch_size = options['batch_size'] or max(1, workers) * 4
+        pool = None
+        if workers:
+            if options['pool'] == 'process':
+                connections.close_all()  # Children must not inherit our sockets.
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=init_process)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+
+        succeeded = failed = 0
+        last_report = None
+        try:
+            while True:
+                if last_report is None or time.monotonic() - last_report >= options['report_interval']:
+                    requeue_stale(options['stale_after'])
+                    self.report()
+                    last_report = time.monotonic()
+
+                job_ids = claim(batch_size)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                results = pool.map(run_in_worker, job_ids) if pool else map(run_job, job_ids)
+                for ok in results:
+                    succeeded, failed = succeeded + ok, failed + (not ok)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+        self.report()
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded + failed} jobs: {succeeded} ok, {failed} failed"))
+
+    def report(self):
+        depth = queue_depth()
+        self.stdout.write("Queue: {due} due, {pending} pending, {running} running, {failed} failed".format(**depth))
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+def default_max_attempts():
+    return getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+
+
+class Job(models.Model):
+    """
+    One queued call of a registered task (see jobs.queue). Workers claim due
+    pending jobs, delete them on success and reschedule them with backoff on
+    failure until max_attempts, after which they stay here as `failed`.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200, verbose_name="Task")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Arguments")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Status")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Attempts")
+    max_attempts = models.PositiveSmallIntegerField(default=default_max_attempts, verbose_name="Max Attempts")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Run After")
+    # Set when a worker claims the job; identifies the rows a claim UPDATE won.
+    claim = models.UUIDField(null=True, blank=True, editable=False, verbose_name="Claim")
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="Claimed At")
+    last_error = models.TextField(blank=True, verbose_name="Last Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Claiming reads due pending jobs in order.
+            models.Index(fields=['status', 'run_after', 'id'], name='job_due_idx'),
+            models.Index(fields=['claim'], name='job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,109 @@
+"""
+A small job queue backed by the jobs_job table.
+
+Functions decorated with @task are registered by name; `func.delay(**kwargs)`
+inserts a Job row, in the caller's transaction, so a job exists exactly when
+the change that caused it commits. `manage.py run_workers` claims due jobs in
+batches and runs them in a thread or process pool.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register `func` as a task and give it a `.delay(**kwargs)` that enqueues it."""
+    def register(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[func.task_name] = func
+        func.delay = lambda **kwargs: enqueue(func.task_name, kwargs, max_attempts=max_attempts)
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(task_name, kwargs=None, run_after=None, max_attempts=None):
+    job = Job(task=task_name, kwargs=kwargs or {}, run_after=run_after or timezone.now())
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    job.save()
+    return job
+
+
+def claim(limit):
+    """Mark up to `limit` due pending jobs as running and return their ids."""
+    token = uuid.uuid4()
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(Job.objects.select_for_update(skip_locked=True)
+                   .filter(status=Job.PENDING, run_after__lte=now)
+                   .order_by('run_after', 'id').values_list('id', flat=True)[:limit])
+        # The status condition makes a concurrent claim of the same rows a no-op.
+        Job.objects.filter(pk__in=ids, status=Job.PENDING).update(
+            status=Job.RUNNING, claim=token, claimed_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(claim=token).values_list('id', flat=True))
+
+
+def run_job(job_id):
+    """Run one claimed job; return True if it succeeded."""
+    job = Job.objects.filter(pk=job_id, status=Job.RUNNING).first()
+    if job is None:
+        return False
+    try:
+        func = registry.get(job.task)
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        func(**job.kwargs)
+    except Exception:
+        _fail(job, traceback.format_exc())
+        return False
+    # Scoped to our claim: if the job was requeued as stale and claimed again
+    # while we ran, the row now belongs to that run.
+    Job.objects.filter(pk=job.pk, claim=job.claim).delete()
+    return True
+
+
+def _fail(job, error):
+    ours = Job.objects.filter(pk=job.pk, claim=job.claim)
+    if job.attempts >= job.max_attempts:
+        logger.error("Job %s failed for good after %d attempts", job, job.attempts)
+        ours.update(status=Job.FAILED, last_error=error, claim=None)
+        return
+    backoff = getattr(settings, 'JOBS_RETRY_BACKOFF', 5) * 2 ** (job.attempts - 1)
+    logger.warning("Job %s failed, retrying in %ss", job, backoff)
+    ours.update(status=Job.PENDING, last_error=error, claim=None,
+                run_after=timezone.now() + timedelta(seconds=backoff))
+
+
+def requeue_stale(older_than):
+    """
+    Put back jobs whose worker died mid-run (claimed more than `older_than`
+    seconds ago); those out of attempts are marked failed instead, so a job
+    that kills its worker is not retried forever. Returns the number requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    stale = Job.objects.filter(status=Job.RUNNING, claimed_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, claim=None, last_error=f"Worker did not finish within {older_than}s")
+    if failed:
+        logger.error("Marked %d stale jobs failed: out of attempts", failed)
+    return stale.update(status=Job.PENDING, claim=None)
+
+
+def queue_depth():
+    """{'pending': n, 'running': n, 'failed': n, 'due': n}"""
+    depth = dict.fromkeys((Job.PENDING, Job.RUNNING, Job.FAILED), 0)
+    depth.update(Job.objects.order_by().values_list('status').annotate(n=Count('id')))
+    depth['due'] = Job.objects.filter(status=Job.PENDING, run_after__lte=timezone.now()).count()
+    return depth
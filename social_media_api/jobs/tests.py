@@ -0,0 +1,100 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim, enqueue, queue_depth, requeue_stale, run_job, task
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+@task(name='jobs.tests.overtaken')
+def overtaken(fail=False):
+    # While this run is slow, the job is declared stale and claimed by another worker.
+    Job.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+    requeue_stale(300)
+    claim(1)
+    if fail:
+        raise RuntimeError("slow and failing")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=60)
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_enqueues_and_workers_run(self):
+        record.delay(value=1)
+        record.delay(value=2)
+        self.assertEqual(calls, [])
+        out = StringIO()
+        call_command('run_workers', workers=0, once=True, stdout=out)
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+        self.assertIn('Ran 2 jobs: 2 ok, 0 failed', out.getvalue())
+
+    def test_claim_is_exclusive_and_respects_run_after(self):
+        first = record.delay(value=1)
+        enqueue('jobs.tests.record', {'value': 2}, run_after=timezone.now() + timedelta(hours=1))
+        self.assertEqual(claim(10), [first.pk])
+        self.assertEqual(claim(10), [])
+        self.assertEqual(queue_depth(), {'pending': 1, 'running': 1, 'failed': 0, 'due': 0})
+
+    def test_failures_back_off_then_fail(self):
+        job = explode.delay()
+        claim(1)
+        self.assertFalse(run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        claim(1)
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_unknown_task_fails_instead_of_crashing(self):
+        job = enqueue('jobs.tests.missing', max_attempts=1)
+        claim(1)
+        self.assertFalse(run_job(job.pk))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+    def test_requeue_stale(self):
+        job = record.delay(value=1)
+        claim(1)
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(300), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.PENDING)
+
+    def test_requeue_stale_fails_jobs_out_of_attempts(self):
+        job = enqueue('jobs.tests.record', {'value': 1}, max_attempts=1)
+        claim(1)
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(300), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+
+    def test_slow_run_leaves_the_new_claim_alone(self):
+        for fail in (False, True):
+            job = overtaken.delay(fail=fail)
+            claim(1)
+            first_claim = Job.objects.get(pk=job.pk).claim
+            run_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.RUNNING, 2))
+            self.assertNotIn(job.claim, (None, first_claim))
+            job.delete()
@@ -0,0 +1,25 @@
+"""
+Entry points for run_workers' pool workers.
+
+Kept free of model imports so that processes started with the "spawn" method
+can unpickle run_in_worker before the app registry is ready.
+"""
+
+
+def init_process():
+    # A no-op after fork(); configures Django in "spawn" children. run_workers
+    # closes its connections before starting the pool, so none are inherited.
+    import django
+
+    django.setup()
+
+
+def run_in_worker(job_id):
+    from django.db import close_old_connections
+
+    from .queue import run_job
+
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
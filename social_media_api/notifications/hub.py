@@ -0,0 +1,190 @@
+"""
+Push delivery of notifications to open server-sent event streams.
+
+Each ASGI worker holds a Hub: for every user with an open stream it keeps one
+bounded asyncio.Queue per connection. publish() may be called from any thread
+(the job worker, a sync view) and hands the payload to each connection's event
+loop with call_soon_threadsafe, so an idle connection costs one queue and one
+suspended coroutine.
+
+Notifications are saved by the job workers, not the processes holding the
+streams, so they cross processes through NOTIFICATION_BROKER_DIR: every
+process that holds streams binds a Unix datagram socket in that directory, and
+broadcast() sends each payload to every socket there, which then republishes
+it to its own hub. The directory must be on the same host as every web and
+job worker, and private to the user they run as (checked on start). Setting it to None keeps delivery in-process, so notifications
+saved by `manage.py run_workers` would never reach a stream.
+"""
+import asyncio
+import atexit
+import contextlib
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+MAX_DATAGRAM = 64 * 1024
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # user_id -> {(loop, queue)}
+
+    @property
+    def queue_size(self):
+        return getattr(settings, 'NOTIFICATION_STREAM_QUEUE_SIZE', 100)
+
+    def connect(self, user_id):
+        """Register a queue for the user's payloads on the running loop; pair with disconnect()."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        return entry[1]
+
+    def disconnect(self, user_id, queue):
+        # Synchronous, so it can run from a finally: in a generator being closed
+        # or garbage collected, without awaiting on a loop that may be gone.
+        with self._lock:
+            entries = self._subscribers.get(user_id, set())
+            entries.difference_update([entry for entry in entries if entry[1] is queue])
+            if not entries:
+                self._subscribers.pop(user_id, None)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, user_id):
+        """Yield a queue receiving the user's payloads until the block exits."""
+        queue = self.connect(user_id)
+        try:
+            yield queue
+        finally:
+            self.disconnect(user_id, queue)
+
+    def publish(self, user_id, payload):
+        """Deliver `payload` to the user's streams in this process; safe from any thread."""
+        with self._lock:
+            entries = list(self._subscribers.get(user_id, ()))
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                pass  # Loop already closed; the subscription is on its way out.
+        return len(entries)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+
+def _offer(queue, payload):
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        logger.warning("Dropping a notification for a stream that is not keeping up")
+
+
+class UnixBroker:
+    """Fans payloads out to every process's hub through Unix datagram sockets."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._lock = threading.Lock()
+        self._reader = None
+        self._sock = None
+        self.path = None
+
+    @property
+    def directory(self):
+        return getattr(settings, 'NOTIFICATION_BROKER_DIR', None)
+
+    def start(self):
+        """Bind this process's socket and start reading it, once, if a broker is configured."""
+        if not self.directory or self._reader is not None:
+            return
+        with self._lock:
+            if self._reader is not None:
+                return
+            _private_directory(self.directory)
+            self.path = os.path.join(self.directory, f'{os.getpid()}.sock')
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self.path)
+            self._sock.settimeout(1.0)  # Lets the reader notice close().
+            self._reader = threading.Thread(target=self._run, args=(self._sock,), name='notification-broker',
+                                            daemon=True)
+            self._reader.start()
+            atexit.register(self.close)
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.path)
+            self._sock = self._reader = None
+
+    def _run(self, sock):
+        while self._sock is sock:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except TimeoutError:
+                continue
+            except OSError:
+                return  # Closed.
+            try:
+                message = json.loads(data)
+                self.hub.publish(message['user_id'], message['payload'])
+            except Exception:
+                logger.exception("Bad notification broker message")
+
+    def send(self, user_id, payload):
+        data = json.dumps({'user_id': user_id, 'payload': payload}).encode()
+        if len(data) > MAX_DATAGRAM:
+            logger.warning("Notification for user %s too large to broadcast", user_id)
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)  # A stalled reader must not block the publisher.
+            for path in glob.glob(os.path.join(self.directory, '*.sock')):
+                try:
+                    sock.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a process that has exited.
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(path)
+                except BlockingIOError:
+                    logger.warning("Notification broker socket %s is full", path)
+
+
+def _private_directory(path):
+    # Whoever can write to the directory can read and forge every user's
+    # notifications, so it must be ours and closed to everyone else.
+    old_umask = os.umask(0o077)
+    try:
+        os.makedirs(path, 0o700, exist_ok=True)
+    finally:
+        os.umask(old_umask)
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise ImproperlyConfigured(
+            f"NOTIFICATION_BROKER_DIR {path} must be owned by this user and closed to others (mode 0700).")
+
+
+hub = Hub()
+broker = UnixBroker(hub)
+
+
+def broadcast(user_id, payload):
+    """Deliver `payload` to the user's open streams in every process (or this one, without a broker)."""
+    if broker.directory:
+        broker.send(user_id, payload)
+    else:
+        hub.publish(user_id, payload)
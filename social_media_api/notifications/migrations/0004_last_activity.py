@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:52
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_last_activity(apps, schema_editor):
+    # Until now created_at was moved forward on every fold, so it is the last activity.
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.update(last_activity_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0003_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-last_activity_at']},
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_coalesce_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_inbox_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notification_unread_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Last Activity At'),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-last_activity_at', '-id'], name='notification_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-last_activity_at', '-id'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'verb', 'target_content_type', 'target_object_id', '-last_activity_at'], name='notification_coalesce_idx'),
+        ),
+    ]
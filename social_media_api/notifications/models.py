@@ -1,9 +1,63 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
 from django.conf import settings
-from django.contrib.contenttypes import generic
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 # Create your models here.
 
+class NotificationManager(models.Manager):
+    def record(self, recipient_id, actor, verb, description, target=None, action_object=None):
+        """
+        Record that `actor` did `verb` to `target`, folding it into the recipient's
+        unread notification for the same (verb, target) if that saw activity within
+        NOTIFICATION_COALESCE_WINDOW seconds. The folded row keeps an actor count
+        and the NOTIFICATION_RECENT_ACTORS latest actor ids, and its
+        last_activity_at moves it to the top of the inbox; created_at is left
+        alone. Returns (notification, created).
+        """
+        window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600)
+        keep = getattr(settings, 'NOTIFICATION_RECENT_ACTORS', 3)
+        now = timezone.now()
+        target_type = ContentType.objects.get_for_model(target) if target is not None else None
+        target_id = target.pk if target is not None else None
+
+        with transaction.atomic():
+            existing = (self.select_for_update()
+                        .filter(recipient_id=recipient_id, verb=verb, is_read=False,
+                                target_content_type=target_type, target_object_id=target_id,
+                                last_activity_at__gte=now - timedelta(seconds=window))
+                        .order_by('-last_activity_at').first())
+            if existing is not None:
+                # Repeat actors among the recent ones are not counted twice.
+                increment = 0 if actor.pk in existing.recent_actor_ids else 1
+                recent = ([actor.pk] + [pk for pk in existing.recent_actor_ids if pk != actor.pk])[:keep]
+                action_type = ContentType.objects.get_for_model(action_object) if action_object is not None else None
+                # select_for_update() is a no-op on SQLite, so the count is added in the
+                # UPDATE itself, and only while the row is still unread.
+                folded = self.filter(pk=existing.pk, is_read=False).update(
+                    actor_count=models.F('actor_count') + increment, recent_actor_ids=recent, actor=actor,
+                    action_object_content_type=action_type,
+                    action_object_object_id=action_object.pk if action_object is not None else None,
+                    last_activity_at=now,
+                )
+                if folded:
+                    existing.refresh_from_db()
+                    existing.message = Notification.summarize(actor, existing.actor_count, verb, description)
+                    existing.save(update_fields=['message'])  # Also sends post_save for the live streams.
+                    return existing, False
+
+            notification = self.create(
+                user_id=recipient_id, recipient_id=recipient_id, actor=actor, verb=verb,
+                target_content_type=target_type, target_object_id=target_id, action_object=action_object,
+                actor_count=1, recent_actor_ids=[actor.pk],
+                message=Notification.summarize(actor, 1, verb, description),
+            )
+            return notification, True
+
+
 class Notification(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -25,16 +79,56 @@ class Notification(models.Model):
         verbose_name="Actor"
     )
     verb = models.CharField(max_length=50, verbose_name="Verb")
-    target = models.ForeignKey(generic.ForeignKey, on_delete=models.CASCADE, null=True, blank=True, related_name='target_notifications', verbose_name="Target")
-    action_object = models.ForeignKey(generic.ForeignKey, on_delete=models.CASCADE, null=True)
+    target_content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='target_notifications',
+        verbose_name="Target Type"
+    )
+    target_object_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Target ID")
+    target = GenericForeignKey('target_content_type', 'target_object_id')
+    action_object_content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='action_object_notifications',
+        verbose_name="Action Object Type"
+    )
+    action_object_object_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Action Object ID")
+    action_object = GenericForeignKey('action_object_content_type', 'action_object_object_id')
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Timestamp")
     message = models.TextField(verbose_name="Message")
+    # Coalesced events (see NotificationManager.record): how many actors, the latest first.
+    actor_count = models.PositiveIntegerField(default=1, verbose_name="Actor Count")
+    recent_actor_ids = models.JSONField(default=list, blank=True, verbose_name="Recent Actors")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    # Moved forward whenever another event is folded in; the inbox is ordered by it.
+    last_activity_at = models.DateTimeField(default=timezone.now, verbose_name="Last Activity At")
     is_read = models.BooleanField(default=False, verbose_name="Is Read")
 
+    objects = NotificationManager()
+
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message[:20]}..."
 
+    @staticmethod
+    def summarize(actor, actor_count, verb, description):
+        if actor_count > 1:
+            others = actor_count - 1
+            return f"{actor.username} and {others} other{'s' if others > 1 else ''} {verb} {description}"
+        return f"{actor.username} {verb} {description}"
+
     class Meta:
-        ordering = ['-created_at']  # Order notifications by creation date (latest first)
+        ordering = ['-last_activity_at']  # Most recently active first
+        indexes = [
+            # Inbox pages, all and unread-only, by keyset on (last_activity_at, id).
+            models.Index(fields=['recipient', '-last_activity_at', '-id'], name='notification_inbox_idx'),
+            models.Index(fields=['recipient', 'is_read', '-last_activity_at', '-id'], name='notification_unread_idx'),
+            # Finding the open notification to fold an event into.
+            models.Index(fields=['recipient', 'verb', 'target_content_type', 'target_object_id', '-last_activity_at'],
+                         name='notification_coalesce_idx'),
+        ]
 
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+
+from .models import Notification
+
+
+def describe(obj):
+    """A small JSON summary of a notification's target or action object."""
+    if obj is None:
+        return None
+    data = {'type': obj._meta.label_lower, 'id': obj.pk}
+    # Only local columns here: anything else would cost a query per row.
+    if hasattr(obj, 'title'):
+        data['title'] = obj.title
+    elif hasattr(obj, 'content'):
+        data['content'] = obj.content[:140]
+    return data
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Expects select_related('actor') and prefetch_related('target', 'action_object')."""
+    actor = serializers.SerializerMethodField()
+    target = serializers.SerializerMethodField()
+    action_object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'verb', 'message', 'actor', 'actor_count', 'recent_actor_ids',
+                  'target', 'action_object', 'is_read', 'created_at', 'last_activity_at']
+        read_only_fields = fields
+
+    def get_actor(self, obj):
+        return {'id': obj.actor_id, 'username': obj.actor.username}
+
+    def get_target(self, obj):
+        return describe(obj.target)
+
+    def get_action_object(self, obj):
+        return describe(obj.action_object)
@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Like
+
+from . import unread
+from .hub import broadcast
+from .models import Notification
+from .serializers import NotificationSerializer
+from .tasks import create_notification
+
+
+def _ref(obj):
+    return [obj._meta.app_label, obj._meta.model_name, obj.pk]
+
+
+# Notifications are written by a worker (see jobs); the request only enqueues.
+
+@receiver(post_save, sender=Like)
+def notify_like(sender, instance, created, **kwargs):
+    post = instance.post
+    if created and post.author_id != instance.user_id:
+        create_notification.delay(
+            recipient_id=post.author_id, actor_id=instance.user_id, verb='liked',
+            description=f'your post "{post.title}"', target=_ref(post),
+        )
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    post = instance.post
+    recipients = {post.author_id: ('commented on', f'your post "{post.title}"', post)}
+    if instance.parent_id:
+        recipients[instance.parent.author_id] = ('replied to', 'your comment', instance.parent)
+    for recipient_id, (verb, description, target) in recipients.items():
+        if recipient_id != instance.author_id:
+            create_notification.delay(
+                recipient_id=recipient_id, actor_id=instance.author_id, verb=verb, description=description,
+                target=_ref(target), action_object=_ref(instance),
+            )
+
+
+@receiver(post_save, sender=Notification)
+def count_unread(sender, instance, created, **kwargs):
+    # Folding an event into an unread notification leaves the count alone.
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: unread.adjust(instance.recipient_id, 1))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_unread(sender, instance, **kwargs):
+    if not instance.is_read:
+        transaction.on_commit(lambda: unread.adjust(instance.recipient_id, -1))
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, **kwargs):
+    # New and coalesced notifications alike go to the recipient's open streams.
+    def push():
+        broadcast(instance.recipient_id, dict(NotificationSerializer(instance).data))
+    transaction.on_commit(push)
@@ -0,0 +1,28 @@
+from django.apps import apps
+from django.contrib.auth import get_user_model
+
+from jobs.queue import task
+
+from .models import Notification
+
+
+def _resolve(ref):
+    if ref is None:
+        return None
+    app_label, model, pk = ref
+    return apps.get_model(app_label, model).objects.filter(pk=pk).first()
+
+
+@task
+def create_notification(recipient_id, actor_id, verb, description, target=None, action_object=None):
+    """
+    Record one event for `recipient_id`, coalesced with similar recent ones.
+    `target` and `action_object` are [app_label, model, pk] triples, so job
+    arguments stay plain JSON.
+    """
+    actor = get_user_model().objects.filter(pk=actor_id).first()
+    target = _resolve(target)
+    if actor is None or target is None:
+        return  # Deleted before the job ran.
+    Notification.objects.record(recipient_id, actor, verb, description,
+                                target=target, action_object=_resolve(action_object))
@@ -1,3 +1,324 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.authentication import token_cache
+from jobs.models import Job
+from posts.models import Comment, Post
+
+from .hub import Hub, UnixBroker, broker, hub
+from .models import Notification
+
+User = get_user_model()
+
+
+class NotificationJobTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.post = Post.objects.create(author=self.alice, title='Hello', content='...')
+        self.client.force_authenticate(user=self.bob)
+
+    def run_workers(self):
+        call_command('run_workers', workers=0, once=True, stdout=StringIO())
+
+    def test_like_enqueues_instead_of_writing(self):
+        self.client.post(f'/posts/{self.post.pk}/like/')
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(Job.objects.get().task, 'notifications.tasks.create_notification')
+
+        self.run_workers()
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.actor, notification.verb),
+                         (self.alice, self.bob, 'liked'))
+        self.assertEqual(notification.target, self.post)
+
+    def test_replies_notify_post_and_parent_authors(self):
+        carol = User.objects.create_user(username='carol', password='testpass123')
+        root = Comment.objects.create(post=self.post, author=carol, content='First')
+        self.client.post(f'/posts/{self.post.pk}/comments/', {'content': 'Reply', 'parent': root.pk})
+        self.run_workers()
+        reply = Comment.objects.get(content='Reply')
+        self.assertEqual(
+            sorted(Notification.objects.filter(actor=self.bob).values_list('recipient__username', 'verb')),
+            [('alice', 'commented on'), ('carol', 'replied to')])
+        self.assertEqual(Notification.objects.filter(actor=self.bob).first().action_object, reply)
+
+    def test_no_notification_for_own_post(self):
+        self.client.force_authenticate(user=self.alice)
+        self.client.post(f'/posts/{self.post.pk}/like/')
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=3600, NOTIFICATION_RECENT_ACTORS=2)
+class CoalescingTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.post = Post.objects.create(author=self.alice, title='Viral', content='...')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass123') for i in range(4)]
+
+    def like(self, user, post=None):
+        Notification.objects.record(self.alice.pk, user, 'liked', 'your post', target=post or self.post)
+
+    def test_events_fold_into_one_row(self):
+        for fan in self.fans:
+            self.like(fan)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 4)
+        self.assertLess(notification.created_at, notification.last_activity_at)
+        self.assertEqual(notification.recent_actor_ids, [self.fans[3].pk, self.fans[2].pk])
+        self.assertEqual(notification.actor, self.fans[3])
+        self.assertEqual(notification.message, 'fan3 and 3 others liked your post')
+
+    def test_repeat_actor_is_not_counted_twice(self):
+        self.like(self.fans[0])
+        self.like(self.fans[1])
+        self.like(self.fans[0])
+        notification = Notification.objects.get()
+        self.assertEqual((notification.actor_count, notification.recent_actor_ids),
+                         (2, [self.fans[0].pk, self.fans[1].pk]))
+
+    def test_new_row_after_window_read_or_other_target(self):
+        self.like(self.fans[0])
+        Notification.objects.update(last_activity_at=timezone.now() - timezone.timedelta(hours=2))
+        self.like(self.fans[1])
+        self.assertEqual(Notification.objects.count(), 2)
+
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[2])
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 1)
+
+        other = Post.objects.create(author=self.alice, title='Other', content='...')
+        self.like(self.fans[2], post=other)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 2)
+
+
+class InboxAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+
+    def add_events(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.alice, title=f'p{i}', content='...')
+            comment = Comment.objects.create(post=post, author=self.alice, content=f'c{i}')
+            Notification.objects.record(self.alice.pk, self.bob, 'liked', 'your post', target=post)
+            Notification.objects.record(self.alice.pk, self.bob, 'replied to', 'your comment',
+                                        target=comment, action_object=comment)
+
+    def test_page_resolves_targets_per_content_type(self):
+        self.add_events(1)
+        # Notifications with actors, then one query per content type: posts and
+        # comments as targets, comments as action objects.
+        with self.assertNumQueries(4):
+            self.client.get('/notifications/')
+        self.add_events(5)
+        with self.assertNumQueries(4):
+            resp = self.client.get('/notifications/')
+        first = resp.data['results'][0]
+        self.assertEqual(first['verb'], 'replied to')
+        self.assertEqual(first['target'], {'type': 'posts.comment', 'id': first['target']['id'], 'content': 'c4'})
+        self.assertEqual(first['actor']['username'], 'bob')
+        self.assertEqual(resp.data['results'][1]['target']['title'], 'p4')
+
+    def test_cursor_pagination_and_unread_filter(self):
+        from social_media_api.pagination import KeysetPagination
+        patcher = mock.patch.object(KeysetPagination, 'page_size', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.add_events(2)
+        Notification.objects.filter(verb='liked').update(is_read=True)
+        first = self.client.get('/notifications/')
+        second = self.client.get(first.data['next'])
+        ids = [n['id'] for n in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, list(Notification.objects.order_by('-last_activity_at', '-id')
+                                   .values_list('id', flat=True)))
+        unread = self.client.get('/notifications/', {'unread': '1'}).data['results']
+        self.assertEqual({n['verb'] for n in unread}, {'replied to'})
+
+    def test_only_own_notifications(self):
+        Notification.objects.record(self.bob.pk, self.alice, 'liked', 'your post',
+                                    target=Post.objects.create(author=self.bob, title='b', content='...'))
+        self.assertEqual(self.client.get('/notifications/').data['results'], [])
+
+
+def use_private_shared_cache(test):
+    """Point the 'shared' cache at a temporary directory: the real one is the deployment's."""
+    cache_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, cache_dir)
+    shared = dict(settings.CACHES['shared'], LOCATION=cache_dir)
+    override = override_settings(CACHES=dict(settings.CACHES, shared=shared))
+    override.enable()
+    test.addCleanup(override.disable)
+    # The token cache holds on to the cache it was first given.
+    test.addCleanup(token_cache.reset)
+    token_cache.reset()
+
+
+class UnreadCounterTestCase(APITestCase):
+    def setUp(self):
+        use_private_shared_cache(self)
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.posts = [Post.objects.create(author=self.alice, title=f'p{i}', content='...') for i in range(4)]
+        self.client.force_authenticate(user=self.alice)
+
+    def notify(self, post):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.record(self.alice.pk, self.bob, 'liked', 'your post', target=post)[0]
+
+    def badge(self):
+        return self.client.get('/notifications/unread-count/').data['unread']
+
+    def test_badge_is_served_from_cache(self):
+        self.notify(self.posts[0])
+        self.assertEqual(self.badge(), 1)  # Miss: counted once.
+        self.notify(self.posts[1])
+        self.notify(self.posts[1])  # Folded into the previous one.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.badge(), 2)
+
+    def test_mark_read_and_mark_all_read_with_bound(self):
+        notifications = [self.notify(post) for post in self.posts]
+        self.assertEqual(self.badge(), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/notifications/{notifications[0].pk}/read/')
+        self.assertEqual(self.badge(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):  # Bound lookup, then one UPDATE.
+                resp = self.client.post('/notifications/mark-all-read/', {'up_to': notifications[2].pk})
+        self.assertEqual(resp.data['marked'], 2)
+        self.assertEqual(self.badge(), 1)
+        self.assertEqual(list(Notification.objects.filter(is_read=False)), [notifications[3]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/notifications/mark-all-read/')
+        self.assertEqual(self.badge(), 0)
+        caches['shared'].clear()
+        self.assertEqual(self.badge(), 0)
+
+    @override_settings(NOTIFICATION_UNREAD_CACHE_ALIAS='default')
+    def test_local_memory_cache_is_refused(self):
+        from .unread import unread_count
+        with self.assertRaises(ImproperlyConfigured):
+            unread_count(self.alice.pk)
+
+
+class NotificationStreamTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.post = Post.objects.create(author=self.alice, title='Hello', content='...')
+        self.token = Token.objects.create(user=self.alice)
+        use_private_shared_cache(self)
+        # Nor may the streams bind to, or broadcast through, the deployment's broker.
+        broker_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, broker_dir)
+        override = override_settings(NOTIFICATION_BROKER_DIR=broker_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(broker.close)
+
+    async def test_publish_from_another_thread(self):
+        local = Hub()
+        async with local.subscribe(7) as queue:
+            threading.Thread(target=local.publish, args=(7, {'id': 1})).start()
+            self.assertEqual(await asyncio.wait_for(queue.get(), 2), {'id': 1})
+            self.assertEqual(local.publish(8, {'id': 2}), 0)
+        self.assertEqual(local.connection_count(), 0)
+
+    async def test_broker_relays_between_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        receiving = Hub()
+        with self.settings(NOTIFICATION_BROKER_DIR=directory):
+            listener = UnixBroker(receiving)
+            listener.start()
+            self.addCleanup(listener.close)
+            async with receiving.subscribe(7) as queue:
+                UnixBroker(Hub()).send(7, {'id': 3})  # Another process's publisher.
+                self.assertEqual(await asyncio.wait_for(queue.get(), 2), {'id': 3})
+
+    def test_broker_refuses_a_directory_others_can_write(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        os.chmod(directory, 0o777)
+        with self.settings(NOTIFICATION_BROKER_DIR=directory):
+            with self.assertRaises(ImproperlyConfigured):
+                UnixBroker(Hub()).start()
+
+    def test_stream_is_refused_under_wsgi(self):
+        ticket = self.ticket()
+        response = self.client.get('/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 501)
+
+    def ticket(self):
+        self.client.force_authenticate(user=self.alice)
+        return self.client.post('/notifications/stream/ticket/').data['ticket']
+
+    async def test_stream_pushes_new_notifications(self):
+        ticket = await sync_to_async(self.ticket)()
+        response = await self.async_client.get('/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b': connected', await anext(stream))
+
+        def record():
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.record(self.alice.pk, self.bob, 'liked', 'your post', target=self.post)
+        await sync_to_async(record)()
+
+        event = await asyncio.wait_for(anext(stream), 2)
+        self.assertIn(b'event: notification', event)
+        self.assertIn(b'bob liked your post', event)
+        await stream.aclose()
+
+    async def test_stream_requires_a_token(self):
+        response = await self.async_client.get('/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+        # API tokens are not accepted in the URL.
+        response = await self.async_client.get('/notifications/stream/', {'token': self.token.key})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/notifications/stream/',
+                                               headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+    async def test_tickets_are_single_use(self):
+        ticket = await sync_to_async(self.ticket)()
+        response = await self.async_client.get('/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        response = await self.async_client.get('/notifications/stream/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_client_disconnect_releases_the_subscription(self):
+        ticket = await sync_to_async(self.ticket)()
+        before = hub.connection_count()
+        response = await self.async_client.get('/notifications/stream/', {'ticket': ticket})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        self.assertEqual(hub.connection_count(), before + 1)
+        # The ASGI handler cancels the response task when the client goes away.
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(hub.connection_count(), before)
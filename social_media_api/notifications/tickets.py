@@ -0,0 +1,41 @@
+"""
+Single-use tickets for opening a notification stream.
+
+EventSource cannot send an Authorization header, so a browser first POSTs to
+/notifications/stream/ticket/ with its API token and then opens
+/notifications/stream/?ticket=<ticket>. Tickets live in a cache shared by all
+processes for NOTIFICATION_STREAM_TICKET_TTL seconds and are deleted when
+redeemed, so the one that lands in access logs is already useless.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _cache():
+    return caches[getattr(settings, 'NOTIFICATION_STREAM_TICKET_CACHE_ALIAS', 'shared')]
+
+
+def _key(ticket):
+    return f'notifications:ticket:{ticket}'
+
+
+def ttl():
+    return getattr(settings, 'NOTIFICATION_STREAM_TICKET_TTL', 30)
+
+
+def issue(user_id):
+    ticket = secrets.token_urlsafe(32)
+    _cache().set(_key(ticket), user_id, ttl())
+    return ticket
+
+
+def redeem(ticket):
+    """Return the ticket's user id, or None if it is unknown, expired or already used."""
+    cache = _cache()
+    user_id = cache.get(_key(ticket))
+    # delete() reports whether this call removed the key, so only one redeemer wins.
+    if user_id is None or not cache.delete(_key(ticket)):
+        return None
+    return user_id
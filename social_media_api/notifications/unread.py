@@ -0,0 +1,50 @@
+"""
+Per-user unread notification counters kept in the cache.
+
+The badge endpoint polls unread_count(), which reads one cache key; the
+database is only counted on a miss. Creating, reading and deleting
+notifications adjust the key in place. Notifications are created by the job
+workers (`manage.py run_workers`), so NOTIFICATION_UNREAD_CACHE_ALIAS must name
+a cache shared with the web processes: a local-memory cache is refused, since
+each process would count on its own copy. Use Redis or memcached across hosts;
+the TTL bounds how long any drift can last.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import Notification
+
+
+def _cache():
+    alias = getattr(settings, 'NOTIFICATION_UNREAD_CACHE_ALIAS', 'shared')
+    cache = caches[alias]
+    if isinstance(cache, LocMemCache):
+        raise ImproperlyConfigured(
+            f"NOTIFICATION_UNREAD_CACHE_ALIAS {alias!r} is a per-process LocMemCache; "
+            "unread counters need a cache shared with the job workers.")
+    return cache
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    cache = _cache()
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.add(_key(user_id), count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TTL', 300))
+    return max(count, 0)
+
+
+def adjust(user_id, delta):
+    """Add `delta` to a cached counter; a missing key is left for the next read to count."""
+    if not delta:
+        return
+    try:
+        _cache().incr(_key(user_id), delta)
+    except ValueError:
+        pass
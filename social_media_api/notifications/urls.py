@@ -0,0 +1,21 @@
+from django.urls import path
+
+from .views import (
+    MarkAllReadView, MarkReadView, NotificationView, StreamTicketView, UnreadCountView, notification_stream,
+)
+
+urlpatterns = [
+    # Inbox of the current user's notifications
+    path('', NotificationView.as_view(), name='notifications'),
+
+    # Live notifications as server-sent events (ASGI)
+    path('stream/', notification_stream, name='notification-stream'),
+    path('stream/ticket/', StreamTicketView.as_view(), name='notification-stream-ticket'),
+
+    # Unread badge count, served from the cache
+    path('unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
+
+    # Mark one / all (up to a bound) notifications read
+    path('<int:pk>/read/', MarkReadView.as_view(), name='notification-read'),
+    path('mark-all-read/', MarkAllReadView.as_view(), name='notifications-mark-all-read'),
+]
@@ -1,12 +1,152 @@
-from django.shortcuts import render
+import asyncio
+import json
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
-class NotificationView(APIView):
+from accounts.authentication import CachedTokenAuthentication
+from social_media_api.pagination import KeysetPagination
+
+from . import tickets, unread
+from .hub import broker, hub
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationView(generics.ListAPIView):
     """
-    View to handle notifications.
-    Currently, this is a placeholder and does not implement any functionality.
+    The current user's notifications, most recently active first; `?unread=1`
+    for unread only. A notification that another event is folded into moves up
+    (never down), so a client paging through never sees a row twice and finds
+    it again at the top on its next refresh.
+    Targets are loaded with one query per content type, so a page costs the
+    same whatever it links to.
     """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-last_activity_at', '-id')
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset.select_related('actor').prefetch_related('target', 'action_object')
+
+
+class UnreadCountView(APIView):
+    """Unread badge, served from the cached counter (notifications.unread)."""
+    permission_classes = [permissions.IsAuthenticated]
+
     def get(self, request):
-        return render(request, 'notifications/notifications.html', {})
+        return Response({"unread": unread.unread_count(request.user.pk)}, status=status.HTTP_200_OK)
+
+
+class MarkReadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        marked = Notification.objects.filter(pk=pk, recipient=request.user, is_read=False).update(is_read=True)
+        transaction.on_commit(lambda: unread.adjust(request.user.pk, -marked))
+        return Response({"marked": marked}, status=status.HTTP_200_OK)
+
+
+class MarkAllReadView(APIView):
+    """
+    Mark unread notifications read with a single UPDATE. With `up_to=<id>`
+    (the newest notification the client has shown), only that one and older
+    ones are marked, so anything that arrived since stays unread.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        queryset = Notification.objects.filter(recipient=request.user, is_read=False)
+        up_to = request.data.get('up_to', request.query_params.get('up_to'))
+        if up_to not in (None, ''):
+            try:
+                up_to = int(up_to)
+            except (TypeError, ValueError):
+                return Response({"error": "up_to must be a notification id."}, status=status.HTTP_400_BAD_REQUEST)
+            ordering = NotificationView.keyset_ordering
+            bound = (Notification.objects.filter(pk=up_to, recipient=request.user)
+                     .values_list(*(name.lstrip('-') for name in ordering)).first())
+            if bound is None:
+                return Response({"error": "Unknown notification."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(KeysetPagination.seek_filter(ordering, bound) | Q(pk=bound[1]))
+        marked = queryset.update(is_read=True)
+        transaction.on_commit(lambda: unread.adjust(request.user.pk, -marked))
+        return Response({"marked": marked}, status=status.HTTP_200_OK)
+
+
+class StreamTicketView(APIView):
+    """
+    A single-use ticket for opening /notifications/stream/?ticket=<ticket> with
+    EventSource, which cannot send the Authorization header (notifications.tickets).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({"ticket": tickets.issue(request.user.pk), "expires_in": tickets.ttl()},
+                        status=status.HTTP_201_CREATED)
+
+
+def _stream_user(request):
+    # API tokens are only accepted in the header; URLs end up in access logs.
+    ticket = request.GET.get('ticket')
+    if ticket:
+        user_id = tickets.redeem(ticket)
+        return get_user_model().objects.filter(pk=user_id, is_active=True).first() if user_id else None
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2 or header[0].lower() != 'token':
+        return None
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(header[1])
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+async def notification_stream(request):
+    """
+    Server-sent events: each new or updated notification of the current user
+    as an `event: notification`, with a comment line every
+    NOTIFICATION_STREAM_KEEPALIVE seconds. Authenticate with a ticket from
+    StreamTicketView or the usual Authorization header. Serve under ASGI
+    (social_media_api.asgi) so idle streams do not hold a thread each; under
+    WSGI the endless stream would never be flushed, so it is refused.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "The notification stream is only served under ASGI."}, status=501)
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    keepalive = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+    broker.start()  # Receive notifications published by other processes, if configured.
+
+    async def events():
+        queue = hub.connect(user.pk)
+        try:
+            yield 'retry: 5000\n: connected\n\n'
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            hub.disconnect(user.pk, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream.
+    return response
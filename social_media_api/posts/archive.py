@@ -0,0 +1,59 @@
+"""
+Hot/cold archival of old posts.
+
+archive_batch() moves a batch of posts, with their comments and likes, from
+the hot tables into ArchivedPost / ArchivedComment / ArchivedLike in one short
+transaction: INSERT ... SELECT into the archive, then DELETE from the hot
+tables, so nothing passes through Python and each batch holds its locks
+briefly. The raw DELETEs fire no signals: like/comment counters and the
+author's posts_count stay as they are (the author still wrote those posts,
+and reconcile_counters counts archived ones too), and the timeline, trending
+and search rows for the posts are removed here, along with this process's
+in-memory trending entries.
+"""
+from django.db import connection, transaction
+
+from .models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post, TimelineEntry, TrendingPost
+from .search import unindex_posts
+from .trending import trending_engine
+
+# (archive model, hot model, column naming the post)
+MOVES = (
+    (ArchivedPost, Post, 'id'),
+    (ArchivedComment, Comment, 'post_id'),
+    (ArchivedLike, Like, 'post_id'),
+)
+# Hot rows deleted once copied, referencing rows first.
+DELETES = (
+    (TimelineEntry, 'post_id'),
+    (TrendingPost, 'post_id'),
+    (Like, 'post_id'),
+    (Comment, 'post_id'),
+    (Post, 'id'),
+)
+
+
+def archivable_post_ids(cutoff, limit):
+    """Ids of the oldest `limit` hot posts created before `cutoff`."""
+    return list(Post.objects.filter(created_at__lt=cutoff).order_by('created_at', 'id')
+                .values_list('id', flat=True)[:limit])
+
+
+def archive_batch(post_ids):
+    """Move `post_ids` and everything hanging off them to the archive tables."""
+    if not post_ids:
+        return 0
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with transaction.atomic(), connection.cursor() as c:
+        for archive, hot, key in MOVES:
+            columns = ', '.join(quote(field.column) for field in archive._meta.concrete_fields
+                                if field.name != 'archived_at')
+            c.execute(f'INSERT INTO {quote(archive._meta.db_table)} ({columns}) '
+                      f'SELECT {columns} FROM {quote(hot._meta.db_table)} WHERE {quote(key)} IN ({placeholders})',
+                      post_ids)
+        for model, key in DELETES:
+            c.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(key)} IN ({placeholders})', post_ids)
+        unindex_posts(post_ids)
+        transaction.on_commit(lambda: trending_engine.forget_many(post_ids))
+    return len(post_ids)
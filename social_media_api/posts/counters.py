@@ -0,0 +1,92 @@
+"""
+Write-buffered like_count / comment_count increments for Post.
+
+Likes and comments on a popular post would otherwise all queue up on that one
+Post row. Instead, deltas are collected in memory and flushed every
+POST_COUNTER_FLUSH_INTERVAL seconds (or after POST_COUNTER_FLUSH_EVENTS events)
+as a few coalesced F() UPDATEs, one per distinct pair of deltas. Anything lost
+on a crash is repaired by `manage.py reconcile_post_counters`.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('like_count', 'comment_count')
+
+
+class CounterBuffer:
+    def __init__(self):
+        self._pending = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        self._events = 0
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    @property
+    def interval(self):
+        return getattr(settings, 'POST_COUNTER_FLUSH_INTERVAL', 0.25)
+
+    @property
+    def max_events(self):
+        return getattr(settings, 'POST_COUNTER_FLUSH_EVENTS', 500)
+
+    def add(self, post_id, field, delta):
+        """Record a change once the surrounding transaction commits."""
+        transaction.on_commit(lambda: self._add(post_id, field, delta))
+
+    def _add(self, post_id, field, delta):
+        if self.interval <= 0:
+            self._apply({post_id: {field: delta}})
+            return
+        with self._lock:
+            self._pending[post_id][field] += delta
+            self._events += 1
+            full = self._events >= self.max_events
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name='post-counters', daemon=True)
+                self._flusher.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+            self._events = 0
+        if pending:
+            self._apply(pending)
+
+    def _apply(self, pending):
+        # Posts with identical deltas share one UPDATE.
+        groups = defaultdict(list)
+        for post_id, deltas in pending.items():
+            key = tuple(deltas.get(field, 0) for field in FIELDS)
+            if any(key):
+                groups[key].append(post_id)
+        for key, post_ids in groups.items():
+            Post.objects.filter(pk__in=post_ids).update(**{
+                field: Greatest(F(field) + delta, 0) for field, delta in zip(FIELDS, key) if delta
+            })
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.interval, 0.01))
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing post counters failed")
+            finally:
+                close_old_connections()
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
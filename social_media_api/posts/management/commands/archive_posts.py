@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archivable_post_ids, archive_batch
+from posts.counters import counter_buffer
+
+
+class Command(BaseCommand):
+    help = 'Move old posts, with their comments and likes, to the archive tables in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'POST_ARCHIVE_AFTER_DAYS', 365),
+                            help='Archive posts created more than this many days ago (default: setting)')
+        parser.add_argument('--batch-size', type=int,
+                            default=getattr(settings, 'POST_ARCHIVE_BATCH_SIZE', 200),
+                            help='Posts moved per transaction (default: setting)')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to sleep between batches so live traffic gets the locks (default: 0.1)')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches (default: until done)')
+
+    def handle(self, *args, **options):
+        # Land this process's buffered counter deltas while the rows are still hot.
+        counter_buffer.flush()
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        moved = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            post_ids = archivable_post_ids(cutoff, options['batch_size'])
+            if not post_ids:
+                break
+            moved += archive_batch(post_ids)
+            batches += 1
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} posts in {batches} batches"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.models import Post
+from posts.search import TABLE, index_posts
+from social_media_api import fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text post search index from the post table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Posts indexed per transaction (default: 1000)')
+
+    def handle(self, *args, **options):
+        if not fts.fts5_available():
+            raise CommandError("Post search needs SQLite with FTS5.")
+
+        with connection.cursor() as c:
+            c.execute(f'DELETE FROM {TABLE}')
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        total = 0
+        while True:
+            posts = list(Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                         .only('pk', 'title', 'content')[:batch_size])
+            if not posts:
+                break
+            with transaction.atomic():
+                index_posts(posts)
+            total += len(posts)
+            last_pk = posts[-1].pk
+
+        with connection.cursor() as c:
+            c.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} posts"))
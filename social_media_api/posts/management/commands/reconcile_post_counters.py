@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.counters import counter_buffer
+from posts.models import Comment, Like, Post
+
+
+def _count(model):
+    counts = (model.objects.filter(post=OuterRef('pk'))
+              .order_by().values('post').annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.like_count and Post.comment_count from the Like and Comment tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of posts recomputed per UPDATE (default: 1000)')
+
+    def handle(self, *args, **options):
+        # Land this process's buffered deltas before the recount rather than on top of it.
+        counter_buffer.flush()
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+        while True:
+            pks = list(Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Post.objects.filter(pk__in=pks).update(
+                    like_count=_count(Like),
+                    comment_count=_count(Comment),
+                )
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {updated} posts"))
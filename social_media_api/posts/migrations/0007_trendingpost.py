@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.post', verbose_name='Post')),
+                ('log_score', models.FloatField(verbose_name='Log Score')),
+                ('rank', models.PositiveIntegerField(verbose_name='Rank')),
+                ('snapshot_at', models.DateTimeField(verbose_name='Snapshot At')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled_posts(apps, schema_editor):
+    # Until now, the posts of authors above the threshold were pulled on read
+    # instead of fanned out.
+    Post = apps.get_model('posts', 'Post')
+    threshold = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+    Post.objects.filter(author__followers_count__gt=threshold).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pulled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('pulled', True)), fields=['author', '-created_at', '-id'], name='post_pulled_recent_idx'),
+        ),
+    ]
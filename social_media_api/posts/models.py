@@ -1,7 +1,60 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Concat, Now
 from django.conf import settings
 
 
+def latest_comments(limit=3):
+    """Prefetch the newest `limit` comments of each post into `post.latest_comments`.
+
+    The slice becomes a ROW_NUMBER() window partitioned by post, so the preview
+    for a whole page is one query however many comments each post has.
+    """
+    queryset = Comment.objects.select_related('author').with_reply_count().order_by('-created_at', '-id')[:limit]
+    return models.Prefetch('comments', queryset=queryset, to_attr='latest_comments')
+
+
+class PostQuerySet(models.QuerySet):
+    def expanded(self):
+        """Load what the expanded serializers embed: the author and a comment preview."""
+        return self.select_related('author').prefetch_related(latest_comments())
+
+    def with_liked_by(self, user):
+        """
+        Annotate each post with `liked_by_me` for `user` using one EXISTS subquery,
+        answered by the (post, user) unique index on Like.
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(liked_by_me=models.Value(False))
+        return self.annotate(liked_by_me=models.Exists(
+            Like.objects.filter(post=models.OuterRef('pk'), user=user)))
+
+
+class ArchiveInclusiveManager(models.Manager):
+    """
+    Post.including_archived is the UNION ALL of the hot posts and ArchivedPost
+    rows, returned as Post instances. Every queryset method (count(), exists(),
+    order_by(), ...) sees both tables; filter(), exclude() and get() apply their
+    conditions to each side. The result can be ordered, sliced and counted, but
+    not filtered further: Django refuses that rather than reading one table.
+    """
+    def get_queryset(self):
+        return self._union(models.Q())
+
+    def filter(self, *args, **kwargs):
+        return self._union(models.Q(*args, **kwargs))
+
+    def exclude(self, *args, **kwargs):
+        return self._union(~models.Q(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        return self.filter(*args, **kwargs).get()
+
+    def _union(self, condition):
+        hot = Post.objects.filter(condition).defer('pulled').order_by()
+        cold = ArchivedPost.objects.filter(condition).defer('archived_at').order_by()
+        return hot.union(cold, all=True)
+
+
 class Post(models.Model):
      author = models.ForeignKey(
         settings.AUTH_USER_MODEL,  # Link to the User model
@@ -13,12 +66,61 @@ class Post(models.Model):
      content = models.TextField(verbose_name="Content")
      created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
      updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+     # Denormalized counts, written through posts.counters.counter_buffer.
+     # `manage.py reconcile_post_counters` recomputes them if they ever drift.
+     like_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Likes")
+     comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Comments")
+     # Not fanned out to followers' timelines (its author was above
+     # FEED_FANOUT_MAX_FOLLOWERS); posts.timeline.read_timeline pulls it instead.
+     pulled = models.BooleanField(default=False, editable=False)
+
+     objects = PostQuerySet.as_manager()
+     # Reads hot and archived posts together; `objects` only sees the hot table.
+     including_archived = ArchiveInclusiveManager()
 
      def __str__(self):
          return self.title
 
      class Meta:
          ordering = ['-created_at']  # Order posts by created date (latest first)
+         indexes = [
+             # Keyset pagination on (created_at, id), see social_media_api.pagination
+             models.Index(fields=['author', '-created_at', '-id'], name='post_author_recent_idx'),
+             models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+             models.Index(fields=['author', '-created_at', '-id'], condition=models.Q(pulled=True),
+                          name='post_pulled_recent_idx'),
+         ]
+
+# Comment threads are stored as materialized paths: each comment's path is its
+# ancestors' ids plus its own, as fixed-width segments ("0000000007/0000000042/").
+# Sorting by path gives depth-first thread order, and a subtree is the range
+# [path, path + PATH_END) on the (post, path) index.
+PATH_SEGMENT_WIDTH = 10
+PATH_END = '~'  # Sorts after every digit and '/'.
+MAX_COMMENT_DEPTH = 20
+
+
+def path_segment(pk):
+    return f"{pk:0{PATH_SEGMENT_WIDTH}d}/"
+
+
+class CommentQuerySet(models.QuerySet):
+    def top_level(self):
+        return self.filter(depth=0)
+
+    def subtree(self, comment):
+        """`comment` and all of its replies, at any depth, as one index range."""
+        return self.filter(post_id=comment.post_id, path__gte=comment.path,
+                           path__lt=comment.path + PATH_END)
+
+    def with_reply_count(self):
+        """Annotate `reply_count`: replies at any depth, counted over each comment's path range."""
+        replies = (Comment.objects
+                   .filter(post=models.OuterRef('post'), path__gt=models.OuterRef('path'),
+                           path__lt=Concat(models.OuterRef('path'), models.Value(PATH_END)))
+                   .order_by().values('post').annotate(n=models.Count('*')).values('n'))
+        return self.annotate(reply_count=Coalesce(models.Subquery(replies), 0))
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -33,15 +135,46 @@ class Comment(models.Model):
          related_name='comments',   # Allow reverse lookup of comments by the user
          verbose_name="Author"
      )
+    parent = models.ForeignKey(
+         'self',
+         null=True,
+         blank=True,
+         on_delete=models.CASCADE,  # Deleting a comment deletes its replies
+         related_name='replies',
+         verbose_name="Parent"
+     )
+    # Set on first save from the parent's path, see PATH_SEGMENT_WIDTH.
+    path = models.CharField(max_length=255, default='', editable=False, verbose_name="Path")
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Depth")
     content = models.TextField(verbose_name="Content")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self):
          return f"Comment by {self.author.username} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+         if self.path:
+             return super().save(*args, **kwargs)
+         # The path ends with our own id, so it can only be written after the INSERT.
+         # bulk_create() bypasses this; comments must be created one by one.
+         with transaction.atomic():
+             self.depth = self.parent.depth + 1 if self.parent_id else 0
+             super().save(*args, **kwargs)
+             self.path = (self.parent.path if self.parent_id else '') + path_segment(self.pk)
+             Comment.objects.filter(pk=self.pk).update(path=self.path)
+
     class Meta:
          ordering = ['created_at']  # Order comments by creation date (oldest first)
+         indexes = [
+             models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+             # Subtrees and reply counts are ranges on path.
+             models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+             # Top-level comments of a post, oldest first.
+             models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_toplevel_idx'),
+         ]
 
 ["models.TextField()"]
 
@@ -67,4 +200,153 @@ class Like(models.Model):
         ordering = ['-created_at']  # Order likes by creation date (latest first)
 
     def __str__(self):
-        return f"{self.user.username} likes {self.post.title}"
\ No newline at end of file
+        return f"{self.user.username} likes {self.post.title}"
+
+
+class TimelineEntry(models.Model):
+    """
+    One post in one user's home timeline, written by posts.timeline when the
+    post is created (fan-out on write). created_at copies the post's so the
+    feed reads a single (owner, created_at) range without joining Post.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Owner"
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Post"
+    )
+    created_at = models.DateTimeField(verbose_name="Created At")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post} in {self.owner}'s timeline"
+
+
+class TrendingPost(models.Model):
+    """
+    One post's trending score, merged from every process by posts.trending. The
+    score is a log-space value relative to trending.EPOCH, so it does not need
+    rewriting as time passes and a restarted process can resume from it.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name="Post"
+    )
+    log_score = models.FloatField(verbose_name="Log Score")
+    rank = models.PositiveIntegerField(verbose_name="Rank")
+    snapshot_at = models.DateTimeField(verbose_name="Snapshot At")
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"#{self.rank}: {self.post_id}"
+
+
+# Cold storage for old posts, filled by `manage.py archive_posts` (see posts.archive).
+# The columns mirror the hot tables in the same order and keep the original ids,
+# so rows are copied with INSERT ... SELECT and can be read back with a UNION.
+
+class ArchivedPost(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name="Author"
+    )
+    title = models.CharField(max_length=200, verbose_name="Title")
+    content = models.TextField(verbose_name="Content")
+    created_at = models.DateTimeField(verbose_name="Created At")
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+    like_count = models.PositiveIntegerField(default=0, verbose_name="Likes")
+    comment_count = models.PositiveIntegerField(default=0, verbose_name="Comments")
+    archived_at = models.DateTimeField(db_default=Now(), verbose_name="Archived At")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['author', '-created_at', '-id'], name='archpost_author_recent_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name="Post"
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name="Author"
+    )
+    # The whole thread is archived together, so parents are always archived too.
+    parent = models.ForeignKey(
+        'self',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name="Parent"
+    )
+    path = models.CharField(max_length=255, verbose_name="Path")
+    depth = models.PositiveSmallIntegerField(default=0, verbose_name="Depth")
+    content = models.TextField(verbose_name="Content")
+    created_at = models.DateTimeField(verbose_name="Created At")
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='archcomment_post_path_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived comment {self.pk} on {self.post_id}"
+
+
+class ArchivedLike(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name="Post"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_likes',
+        verbose_name="User"
+    )
+    created_at = models.DateTimeField(verbose_name="Created At")
+
+    class Meta:
+        unique_together = ('post', 'user')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user_id} liked archived post {self.post_id}"
@@ -0,0 +1,60 @@
+"""
+Title/content search backed by the posts_post_fts FTS5 table (SQLite only).
+
+The table mirrors Post(title, content) with rowid = post id. It is kept in
+sync by the signals in posts.signals and can be rebuilt from scratch with
+`manage.py rebuild_post_index`.
+"""
+import html
+
+from django.db import connection
+
+from social_media_api import fts
+
+TABLE = 'posts_post_fts'
+# bm25 column weights: a title hit outranks a content hit.
+WEIGHTS = (5.0, 1.0)
+HIGHLIGHT = ('<mark>', '</mark>')
+# FTS5 marks matches with these control characters; the text is escaped before
+# they become HIGHLIGHT, so user-supplied markup never reaches the client raw.
+SENTINELS = ('\x02', '\x03')
+SNIPPET_TOKENS = 24
+
+
+def index_posts(posts):
+    if not fts.fts5_available() or not posts:
+        return
+    with connection.cursor() as c:
+        c.executemany(f'INSERT OR REPLACE INTO {TABLE}(rowid, title, content) VALUES (%s, %s, %s)',
+                      [(post.pk, post.title, post.content) for post in posts])
+
+
+def unindex_post(post_id):
+    unindex_posts([post_id])
+
+
+def unindex_posts(post_ids):
+    if fts.fts5_available() and post_ids:
+        with connection.cursor() as c:
+            c.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk in post_ids])
+
+
+def search_posts(query, cursor=None, limit=20):
+    """
+    Return ([(post_id, title_highlight, content_snippet), ...], next_cursor),
+    best match first. Both texts are HTML-escaped, with matches wrapped in HIGHLIGHT.
+    """
+    columns = (
+        f"highlight({TABLE}, 0, char(2), char(3))",
+        f"snippet({TABLE}, 1, char(2), char(3), '…', {SNIPPET_TOKENS})",
+    )
+    rows, next_cursor = fts.ranked_search(TABLE, query, weights=WEIGHTS, columns=columns,
+                                          cursor=cursor, limit=limit)
+    return [(row[0], _mark(row[2]), _mark(row[3])) for row in rows], next_cursor
+
+
+def _mark(text):
+    text = html.escape(text or '')
+    for sentinel, tag in zip(SENTINELS, HIGHLIGHT):
+        text = text.replace(sentinel, tag)
+    return text
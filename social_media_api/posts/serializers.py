@@ -1,13 +1,64 @@
 from rest_framework import serializers
-from .models import Post , Comment
+
+from accounts.serializers import UserSummarySerializer
+
+from .models import MAX_COMMENT_DEPTH, Post , Comment, Like
 
 class PostSerializer(serializers.ModelSerializer):
+    # Read from the `liked_by_me` annotation (Post.objects.with_liked_by) when present.
+    liked_by_me = serializers.SerializerMethodField()
+
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'created_at', 'updated_at', 'author']
-        
+        fields = ['id', 'title', 'content', 'created_at', 'updated_at', 'author', 'like_count', 'comment_count',
+                  'liked_by_me']
+        read_only_fields = ['author', 'like_count', 'comment_count']
+
+    def get_liked_by_me(self, obj):
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
+        # Single objects (e.g. a freshly created post) fall back to one lookup.
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return Like.objects.filter(post=obj, user=request.user).exists()
+
 
 class CommentSerializer(serializers.ModelSerializer):
+    parent = serializers.PrimaryKeyRelatedField(queryset=Comment.objects.all(), required=False, allow_null=True)
+    # Read from the `reply_count` annotation (Comment.objects.with_reply_count) when present.
+    reply_count = serializers.SerializerMethodField()
+
     class Meta:
         model = Comment
-        fields = ['id', 'content', 'created_at', 'updated_at', 'author', 'post']
\ No newline at end of file
+        fields = ['id', 'content', 'created_at', 'updated_at', 'author', 'post', 'parent', 'depth', 'reply_count']
+        read_only_fields = ['author', 'post', 'depth']
+
+    def validate_parent(self, value):
+        if self.instance is not None and value != self.instance.parent:
+            raise serializers.ValidationError("A comment cannot be moved to another thread.")
+        if value is not None and value.depth + 1 >= MAX_COMMENT_DEPTH:
+            raise serializers.ValidationError("This thread is nested too deeply to reply to.")
+        return value
+
+    def get_reply_count(self, obj):
+        if hasattr(obj, 'reply_count'):
+            return obj.reply_count
+        return Comment.objects.subtree(obj).count() - 1
+
+
+class ExpandedCommentSerializer(CommentSerializer):
+    """Comment with its author embedded; expects `select_related('author')`."""
+    author = UserSummarySerializer(read_only=True)
+
+
+class ExpandedPostSerializer(PostSerializer):
+    """
+    Post with its author and newest comments embedded; expects the queryset
+    from Post.objects.expanded() so a page costs a constant number of queries.
+    """
+    author = UserSummarySerializer(read_only=True)
+    latest_comments = ExpandedCommentSerializer(many=True, read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['latest_comments']
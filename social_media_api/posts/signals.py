@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import Follow, follows_created
+
+from . import timeline
+from .counters import counter_buffer
+from .models import Comment, Like, Post
+from .search import index_posts, unindex_post
+from .trending import trending_engine
+
+
+@receiver(post_save, sender=Post)
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        get_user_model().objects.filter(pk=instance.author_id).update(posts_count=F('posts_count') + 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.schedule(timeline.fan_out, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_posts_count(sender, instance, **kwargs):
+    get_user_model().objects.filter(pk=instance.author_id).update(posts_count=Greatest(F('posts_count') - 1, 0))
+
+
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, update_fields=None, **kwargs):
+    # Counter and other bookkeeping saves don't touch indexed columns.
+    if update_fields is None or {'title', 'content'} & set(update_fields):
+        index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_for_search(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_trending_post(sender, instance, **kwargs):
+    trending_engine.forget(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.schedule(timeline.backfill, instance.follower_id, instance.followee_id)
+
+
+@receiver(follows_created, sender=Follow)
+def backfill_timelines(sender, follower_id, followee_ids, **kwargs):
+    timeline.schedule(timeline.backfill_many, follower_id, followee_ids)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.schedule(timeline.prune, instance.follower_id, instance.followee_id)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        counter_buffer.add(instance.post_id, 'like_count', 1)
+        trending_engine.record(instance.post_id, 'like')
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    counter_buffer.add(instance.post_id, 'like_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counter_buffer.add(instance.post_id, 'comment_count', 1)
+        trending_engine.record(instance.post_id, 'comment')
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counter_buffer.add(instance.post_id, 'comment_count', -1)
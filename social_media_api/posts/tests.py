@@ -1,3 +1,469 @@
-from django.test import TestCase
+import math
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import NotSupportedError
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import Follow
+
+from social_media_api.pagination import KeysetPagination
+
+from .counters import CounterBuffer
+from .models import ArchivedComment, ArchivedLike, ArchivedPost, Comment, Like, Post, TimelineEntry, TrendingPost
+from .trending import EPOCH, TrendingEngine, trending_engine
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT_ASYNC=False)
+class FeedAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.carol = User.objects.create_user(username='carol', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.follow(self.alice, self.bob)
+        self.client.force_authenticate(user=self.alice)
+
+    def post_as(self, author, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=author, title=title, content='...')
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        post = self.post_as(self.bob, 'hello')
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.alice, post=post).exists())
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.bob, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.carol).exists())
+
+    def test_feed_lists_followed_posts_newest_first(self):
+        self.post_as(self.bob, 'first')
+        self.post_as(self.carol, 'not followed')
+        self.post_as(self.alice, 'mine')
+        resp = self.client.get('/posts/feed/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['title'] for p in resp.data['results']], ['mine', 'first'])
+        expanded = self.client.get('/posts/feed/', {'expand': '1'}).data['results']
+        self.assertEqual([p['author']['username'] for p in expanded], ['alice', 'bob'])
+
+    def test_authors_above_threshold_are_pulled_on_read(self):
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            post = self.post_as(self.bob, 'celebrity post')
+            self.assertFalse(TimelineEntry.objects.filter(owner=self.alice, post=post).exists())
+            resp = self.client.get('/posts/feed/')
+        self.assertEqual([p['title'] for p in resp.data['results']], ['celebrity post'])
+
+    def test_pulled_posts_stay_after_the_author_drops_under_threshold(self):
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=0):
+            self.post_as(self.bob, 'celebrity post')
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=1):
+            self.post_as(self.bob, 'fanned out')
+            resp = self.client.get('/posts/feed/')
+        self.assertEqual([p['title'] for p in resp.data['results']], ['fanned out', 'celebrity post'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        self.post_as(self.carol, 'older post')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.follow(self.alice, self.carol)
+        self.assertEqual([p['title'] for p in self.client.get('/posts/feed/').data['results']], ['older post'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.unfollow(self.alice, self.carol)
+        self.assertEqual(self.client.get('/posts/feed/').data['results'], [])
+
+
+@override_settings(FEED_FANOUT_ASYNC=False)
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts = [Post.objects.create(author=self.alice, title=f'post {i}', content='...') for i in range(7)]
+        # Ties on created_at must be broken by id.
+        tied = [p.pk for p in self.posts[2:5]]
+        now = timezone.now()
+        Post.objects.filter(pk__in=tied).update(created_at=now)
+        TimelineEntry.objects.filter(post__in=tied).update(created_at=now)
+        patcher = mock.patch.object(KeysetPagination, 'page_size', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in resp.data['results'])
+            url = resp.data['next']
+        return seen
+
+    def test_user_posts_pages_cover_every_post_once(self):
+        seen = self.walk(f'/posts/users/{self.alice.pk}/')
+        expected = list(Post.objects.filter(author=self.alice).order_by('-created_at', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_seek_is_an_index_range(self):
+        post = self.posts[3]
+        seek = KeysetPagination.seek_filter(('-created_at', '-id'), (post.created_at, post.pk))
+        plan = Post.objects.filter(seek, author=self.alice).order_by('-created_at', '-id').explain()
+        self.assertIn('created_at<', plan.replace(' ', ''))
+
+    def test_feed_pages_cover_every_post_once(self):
+        seen = self.walk('/posts/feed/')
+        self.assertEqual(sorted(seen), sorted(p.pk for p in self.posts))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_comments_oldest_first(self):
+        post = self.posts[0]
+        for i in range(4):
+            self.client.post(f'/posts/{post.pk}/comments/', {'content': f'c{i}'})
+        seen = self.walk(f'/posts/{post.pk}/comments/')
+        self.assertEqual(seen, list(Comment.objects.filter(post=post).order_by('created_at', 'id')
+                                    .values_list('id', flat=True)))
+
+    def test_deep_page_costs_the_same_as_first(self):
+        first = self.client.get(f'/posts/users/{self.alice.pk}/')
+        with self.assertNumQueries(1):
+            self.client.get(f'/posts/users/{self.alice.pk}/')
+        with self.assertNumQueries(1):
+            self.client.get(first.data['next'])
+
+    def test_invalid_cursor_is_404(self):
+        resp = self.client.get('/posts/feed/', {'cursor': 'garbage'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.client.force_authenticate(user=self.alice)
+
+    def test_create_sets_author(self):
+        resp = self.client.post('/posts/', {'title': 'Hi', 'content': 'There', 'author': self.bob.pk})
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.get().author, self.alice)
+
+    def test_only_author_can_edit(self):
+        post = Post.objects.create(author=self.bob, title='Bob', content='...')
+        resp = self.client.patch(f'/posts/{post.pk}/', {'title': 'Hacked'})
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_liked_by_me_is_one_query_per_page(self):
+        posts = [Post.objects.create(author=self.bob, title=f'p{i}', content='...') for i in range(5)]
+        Like.objects.create(post=posts[1], user=self.alice)
+        Like.objects.create(post=posts[3], user=self.bob)
+        with self.assertNumQueries(1):
+            resp = self.client.get(f'/posts/users/{self.bob.pk}/')
+        liked = {p['title']: p['liked_by_me'] for p in resp.data['results']}
+        self.assertEqual(liked, {'p0': False, 'p1': True, 'p2': False, 'p3': False, 'p4': False})
+        self.assertTrue(self.client.get(f'/posts/{posts[1].pk}/').data['liked_by_me'])
+
+    def test_expanded_page_costs_constant_queries(self):
+        def add_posts(count):
+            for i in range(count):
+                post = Post.objects.create(author=self.bob, title=f'p{i}', content='...')
+                for j in range(5):
+                    Comment.objects.create(post=post, author=self.alice, content=f'c{j}')
+
+        add_posts(2)
+        with self.assertNumQueries(2):
+            self.client.get(f'/posts/users/{self.bob.pk}/', {'expand': '1'})
+        add_posts(10)
+        with self.assertNumQueries(2):
+            resp = self.client.get(f'/posts/users/{self.bob.pk}/', {'expand': '1'})
+
+        post = resp.data['results'][0]
+        self.assertEqual(post['author']['username'], 'bob')
+        self.assertEqual([c['content'] for c in post['latest_comments']], ['c4', 'c3', 'c2'])
+        self.assertEqual(post['latest_comments'][0]['author']['username'], 'alice')
+        self.assertIsInstance(self.client.get(f'/posts/users/{self.bob.pk}/').data['results'][0]['author'], int)
+
+
+class CommentThreadTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.post = Post.objects.create(author=self.alice, title='Hello', content='...')
+        self.client.force_authenticate(user=self.alice)
+
+    def reply(self, content, parent=None, post=None):
+        post = post or self.post
+        data = {'content': content}
+        if parent is not None:
+            data['parent'] = parent
+        return self.client.post(f'/posts/{post.pk}/comments/', data)
+
+    def test_replies_form_a_depth_first_thread(self):
+        root = self.reply('root').data['id']
+        a = self.reply('a', root).data['id']
+        self.reply('a1', a)
+        self.reply('b', root)
+        self.reply('other thread')
+
+        with self.assertNumQueries(2):
+            resp = self.client.get(f'/posts/comments/{root}/thread/')
+        self.assertEqual([(c['content'], c['depth']) for c in resp.data['results']],
+                         [('root', 0), ('a', 1), ('a1', 2), ('b', 1)])
+        self.assertEqual([c['reply_count'] for c in resp.data['results']], [3, 1, 0, 0])
+
+        top = self.client.get(f'/posts/{self.post.pk}/comments/').data['results']
+        self.assertEqual([(c['content'], c['reply_count']) for c in top], [('root', 3), ('other thread', 0)])
+
+    def test_deleting_a_comment_deletes_its_replies(self):
+        root = self.reply('root').data['id']
+        self.reply('a', self.reply('a', root).data['id'])
+        self.client.delete(f'/posts/comments/{root}/')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_reply_must_be_on_the_same_post(self):
+        other = Post.objects.create(author=self.alice, title='Other', content='...')
+        root = self.reply('root', post=other).data['id']
+        resp = self.reply('reply', root)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', resp.data)
+
+
+class PostSearchAPITestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.intro = Post.objects.create(author=self.alice, title='Django tips',
+                                         content='Use select_related for foreign keys.')
+        self.other = Post.objects.create(author=self.alice, title='Weekend',
+                                         content='Went hiking, then read about django signals.')
+        Post.objects.create(author=self.alice, title='Cooking', content='Pasta night.')
+        self.client.force_authenticate(user=self.alice)
+
+    def search(self, q, **params):
+        return self.client.get('/posts/search/', {'q': q, **params})
+
+    def test_title_hits_rank_first_and_are_highlighted(self):
+        results = self.search('djan').data['results']
+        self.assertEqual([r['id'] for r in results], [self.intro.pk, self.other.pk])
+        self.assertEqual(results[0]['title_highlight'], '<mark>Django</mark> tips')
+        self.assertIn('<mark>django</mark>', results[1]['snippet'])
+        self.assertIn('liked_by_me', results[0])
+
+    def test_highlights_escape_user_markup(self):
+        post = Post.objects.create(author=self.alice, title='<script>alert(1)</script> xss',
+                                   content='<img src=x onerror=alert(1)> xss payload')
+        [result] = self.search('xss').data['results']
+        self.assertEqual(result['id'], post.pk)
+        self.assertEqual(result['title_highlight'],
+                         '&lt;script&gt;alert(1)&lt;/script&gt; <mark>xss</mark>')
+        self.assertNotIn('<img', result['snippet'])
+        self.assertIn('&lt;img', result['snippet'])
+        self.assertIn('<mark>xss</mark>', result['snippet'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.content = 'Went climbing.'
+        self.other.save()
+        self.assertEqual([r['id'] for r in self.search('climb').data['results']], [self.other.pk])
+        self.other.delete()
+        self.assertEqual(self.search('climb').data['results'], [])
+
+    def test_keyset_pagination(self):
+        from .views import PostSearchView
+        patcher = mock.patch.object(PostSearchView, 'page_size', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        first = self.search('django')
+        second = self.search('django', cursor=first.data['next'])
+        self.assertEqual([r['id'] for page in (first, second) for r in page.data['results']],
+                         [self.intro.pk, self.other.pk])
+        self.assertIsNone(second.data['next'])
+        self.assertEqual(self.search('django', cursor='garbage').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_post_index(self):
+        from django.db import connection
+        with connection.cursor() as c:
+            c.execute('DELETE FROM posts_post_fts')
+        self.assertEqual(self.search('pasta').data['results'], [])
+        call_command('rebuild_post_index', batch_size=2, stdout=StringIO())
+        self.assertEqual([r['title'] for r in self.search('pasta').data['results']], ['Cooking'])
+
+
+@override_settings(TRENDING_SIZE=2, TRENDING_HALF_LIFE=3600, TRENDING_SNAPSHOT_INTERVAL=0, POST_COUNTER_FLUSH_INTERVAL=0)
+class TrendingTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.posts = [Post.objects.create(author=self.alice, title=f'p{i}', content='...') for i in range(3)]
+        self.client.force_authenticate(user=self.alice)
+        trending_engine.reset()
+        self.addCleanup(trending_engine.reset)
+
+    def test_top_k_keeps_the_best_decayed_scores(self):
+        engine = TrendingEngine()
+        p0, p1, p2 = (p.pk for p in self.posts)
+        now = EPOCH + 10 * 3600
+        engine._record(p0, 4.0, now - 3 * 3600)  # 4 * 2^-3 = 0.5
+        engine._record(p1, 1.0, now)
+        engine._record(p2, 2.0, now)
+        self.assertEqual([pk for pk, _ in engine.top(now=now)], [p2, p1])
+        engine._record(p0, 3.0, now)
+        ranking = engine.top(now=now)
+        self.assertEqual([pk for pk, _ in ranking], [p0, p2])
+        self.assertAlmostEqual(ranking[0][1], 3.5)
+
+    def test_snapshot_round_trip(self):
+        engine = TrendingEngine()
+        engine._record(self.posts[1].pk, 1.0, EPOCH)
+        engine._record(self.posts[2].pk, 2.0, EPOCH)
+        engine.snapshot()
+        self.assertEqual(list(TrendingPost.objects.values_list('post_id', 'rank')),
+                         [(self.posts[2].pk, 1), (self.posts[1].pk, 2)])
+        self.assertEqual([pk for pk, _ in TrendingEngine().top()], [self.posts[2].pk, self.posts[1].pk])
+
+    def test_snapshots_from_several_processes_add_up(self):
+        first, second = TrendingEngine(), TrendingEngine()
+        p0, p1, p2 = (p.pk for p in self.posts)
+        first._record(p0, 1.0, EPOCH)
+        first._record(p1, 2.0, EPOCH)
+        second._record(p0, 2.0, EPOCH)
+        second._record(p2, 1.0, EPOCH)
+        first.snapshot()
+        second.snapshot()
+        self.assertEqual(list(TrendingPost.objects.values_list('post_id', 'rank')), [(p0, 1), (p1, 2), (p2, 3)])
+        self.assertAlmostEqual(math.exp(TrendingPost.objects.get(post_id=p0).log_score), 3.0)
+        # Each process now serves the combined ranking, and a later snapshot does not count again.
+        self.assertEqual([pk for pk, _ in second.top(now=EPOCH)], [p0, p1])
+        first._record(p2, 3.0, EPOCH)
+        first.snapshot()
+        scores = {pk: math.exp(score) for pk, score in TrendingPost.objects.values_list('post_id', 'log_score')}
+        self.assertEqual({pk: round(score, 6) for pk, score in scores.items()}, {p0: 3.0, p1: 2.0, p2: 4.0})
+        self.assertEqual([pk for pk, _ in first.top(now=EPOCH)], [p2, p0])
+
+    def test_endpoint_ranks_by_engagement(self):
+        bob = User.objects.create_user(username='bob', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(post=self.posts[0], user=bob)
+            Comment.objects.create(post=self.posts[1], author=bob, content='!')
+        with self.assertNumQueries(1):
+            resp = self.client.get('/posts/trending/')
+        self.assertEqual([p['title'] for p in resp.data['results']], ['p1', 'p0'])
+        self.posts[1].delete()
+        self.assertEqual([p['title'] for p in self.client.get('/posts/trending/').data['results']], ['p0'])
+
+
+@override_settings(FEED_FANOUT_ASYNC=False)
+class ArchiveTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.old = Post.objects.create(author=self.alice, title='Ancient', content='history')
+            self.new = Post.objects.create(author=self.alice, title='Fresh', content='news')
+        Post.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timezone.timedelta(days=400))
+        root = Comment.objects.create(post=self.old, author=self.bob, content='first')
+        Comment.objects.create(post=self.old, author=self.alice, content='reply', parent=root)
+        Like.objects.create(post=self.old, user=self.bob)
+        Like.objects.create(post=self.new, user=self.bob)
+        self.client.force_authenticate(user=self.alice)
+
+    def archive(self, **options):
+        call_command('archive_posts', older_than_days=365, pause=0, stdout=StringIO(), **options)
+
+    def test_old_posts_move_with_comments_and_likes(self):
+        self.archive(batch_size=1)
+        self.assertEqual(list(Post.objects.values_list('title', flat=True)), ['Fresh'])
+        self.assertEqual(list(ArchivedPost.objects.values_list('id', 'title')), [(self.old.pk, 'Ancient')])
+        self.assertEqual(ArchivedComment.objects.filter(post_id=self.old.pk).count(), 2)
+        self.assertEqual(ArchivedComment.objects.get(content='reply').parent.content, 'first')
+        self.assertEqual(ArchivedLike.objects.get().post_id, self.old.pk)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Like.objects.get().post, self.new)
+        self.assertFalse(TimelineEntry.objects.filter(post_id=self.old.pk).exists())
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.posts_count, 2)
+
+    def test_reconcile_counts_archived_posts(self):
+        self.archive()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.posts_count, 2)
+
+    @override_settings(TRENDING_SIZE=1, TRENDING_SNAPSHOT_INTERVAL=0)
+    def test_archived_posts_leave_the_trending_engine(self):
+        trending_engine.reset()
+        self.addCleanup(trending_engine.reset)
+        trending_engine._record(self.old.pk, 3.0, EPOCH)
+        trending_engine._record(self.new.pk, 1.0, EPOCH)
+        self.assertEqual([pk for pk, _ in trending_engine.top()], [self.old.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.archive()
+        self.assertEqual([pk for pk, _ in trending_engine.top()], [self.new.pk])
+
+    def test_default_reads_are_hot_only(self):
+        self.archive()
+        self.assertEqual([p['title'] for p in self.client.get('/posts/feed/').data['results']], ['Fresh'])
+        self.assertEqual(self.client.get('/posts/search/', {'q': 'history'}).data['results'], [])
+        self.assertEqual(self.client.get(f'/posts/{self.old.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+
+        everything = Post.including_archived.filter(author=self.alice).order_by('-created_at')
+        self.assertEqual([(type(p), p.title) for p in everything], [(Post, 'Fresh'), (Post, 'Ancient')])
+        self.assertEqual(everything.count(), 2)
+
+    def test_every_including_archived_read_sees_both_tables(self):
+        self.archive()
+        self.assertEqual(Post.including_archived.count(), 2)
+        self.assertEqual(Post.including_archived.get(pk=self.old.pk).title, 'Ancient')
+        self.assertTrue(Post.including_archived.filter(pk=self.old.pk).exists())
+        self.assertEqual([p.title for p in Post.including_archived.exclude(pk=self.new.pk)], ['Ancient'])
+        self.assertEqual([p.title for p in Post.including_archived.order_by('created_at')], ['Ancient', 'Fresh'])
+        with self.assertRaises(NotSupportedError):
+            Post.including_archived.all().filter(pk=self.old.pk)
+
+    def test_max_batches_bounds_a_run(self):
+        Post.objects.filter(pk=self.new.pk).update(created_at=timezone.now() - timezone.timedelta(days=500))
+        self.archive(batch_size=1, max_batches=1)
+        self.assertEqual(list(ArchivedPost.objects.values_list('title', flat=True)), ['Fresh'])
+        self.assertEqual(Post.objects.count(), 1)
+
+
+@override_settings(POST_COUNTER_FLUSH_INTERVAL=0)
+class PostCounterTestCase(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        self.post = Post.objects.create(author=self.alice, title='Hello', content='...')
+        self.client.force_authenticate(user=self.bob)
+
+    def test_like_unlike_and_comment_update_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f'/posts/{self.post.pk}/like/').status_code, status.HTTP_201_CREATED)
+            self.client.post(f'/posts/{self.post.pk}/like/')
+            self.client.post(f'/posts/{self.post.pk}/comments/', {'content': 'Nice'})
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/posts/{self.post.pk}/unlike/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_buffer_coalesces_updates(self):
+        other = Post.objects.create(author=self.alice, title='Other', content='...')
+        buffer = CounterBuffer()
+        with self.settings(POST_COUNTER_FLUSH_INTERVAL=3600):
+            for _ in range(3):
+                buffer._add(self.post.pk, 'like_count', 1)
+                buffer._add(other.pk, 'like_count', 1)
+            buffer._add(self.post.pk, 'comment_count', 1)
+            buffer._add(other.pk, 'comment_count', 1)
+            # Eight events, two posts with identical deltas: one UPDATE.
+            with self.assertNumQueries(1):
+                buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (3, 1))
+
+    def test_reconcile_post_counters(self):
+        Like.objects.create(post=self.post, user=self.bob)  # callbacks never run: counter drifts
+        Post.objects.filter(pk=self.post.pk).update(comment_count=5)
+        call_command('reconcile_post_counters', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 0))
@@ -0,0 +1,122 @@
+"""
+Home timelines, materialized by fanning each new post out to its author's
+followers (TimelineEntry rows), so reading a feed is one indexed range scan.
+
+Posts by authors with more than FEED_FANOUT_MAX_FOLLOWERS followers are not
+fanned out, so one post from a very large account does not turn into millions
+of inserts: they are marked `pulled` and read_timeline pulls them at read time.
+The decision sticks to the post, so those posts stay in the feed after the
+author drops back under the threshold.
+"""
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+
+from accounts.models import Follow
+from social_media_api.pagination import KeysetPagination
+
+from .models import Post, TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def fanout_threshold():
+    return getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def fan_out(post_id):
+    """Insert `post_id` into its author's timeline and each follower's."""
+    post = Post.objects.filter(pk=post_id).select_related('author').first()
+    if post is None:
+        return
+    entries = [TimelineEntry(owner_id=post.author_id, post=post, created_at=post.created_at)]
+    if post.author.followers_count > fanout_threshold():
+        Post.objects.filter(pk=post.pk).update(pulled=True)
+    else:
+        batch_size = getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 1000)
+        follower_ids = (Follow.objects.filter(followee_id=post.author_id)
+                        .values_list('follower_id', flat=True).iterator(chunk_size=batch_size))
+        entries.extend(TimelineEntry(owner_id=pk, post=post, created_at=post.created_at)
+                       for pk in follower_ids)
+    TimelineEntry.objects.bulk_create(entries, batch_size=getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 1000),
+                                      ignore_conflicts=True)
+
+
+def backfill(owner_id, author_id):
+    """Copy the author's latest posts into a new follower's timeline."""
+    backfill_many(owner_id, [author_id])
+
+
+def backfill_many(owner_id, author_ids):
+    """Copy each author's latest posts into a new follower's timeline, in one insert."""
+    limit = getattr(settings, 'FEED_BACKFILL_POSTS', 20)
+    entries = []
+    for author_id in author_ids:
+        posts = (Post.objects.filter(author_id=author_id).order_by('-created_at', '-id')
+                 .values('id', 'created_at')[:limit])
+        entries.extend(TimelineEntry(owner_id=owner_id, post_id=p['id'], created_at=p['created_at']) for p in posts)
+    TimelineEntry.objects.bulk_create(entries, batch_size=getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 1000),
+                                      ignore_conflicts=True)
+
+
+def prune(owner_id, author_id):
+    """Drop an unfollowed author's posts from the former follower's timeline."""
+    TimelineEntry.objects.filter(owner_id=owner_id, post__author_id=author_id).delete()
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Timeline job %s%r failed", func.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'FEED_FANOUT_WORKERS', 2),
+                                           thread_name_prefix='timeline')
+    return _executor
+
+
+def schedule(func, *args):
+    """Run a timeline job off the request path once the current transaction commits."""
+    if getattr(settings, 'FEED_FANOUT_ASYNC', True):
+        transaction.on_commit(lambda: executor().submit(_run, func, *args))
+    else:
+        transaction.on_commit(lambda: func(*args))
+
+
+def read_timeline(user, limit, before=None):
+    """
+    Return up to `limit` posts for `user`'s home feed, newest first.
+
+    Merges the materialized timeline with the `pulled` posts of followed
+    authors (those not fanned out). `before` is an optional
+    (created_at, post_id) bound for the next page.
+    """
+    entries = TimelineEntry.objects.filter(owner=user)
+    pulled = Post.objects.filter(pulled=True, author__in=get_user_model().objects.filter(followers=user))
+    if before is not None:
+        entries = entries.filter(KeysetPagination.seek_filter(('-created_at', '-post_id'), before))
+        pulled = pulled.filter(KeysetPagination.seek_filter(('-created_at', '-id'), before))
+
+    keys = heapq.merge(
+        entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit],
+        pulled.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit],
+        reverse=True,
+    )
+    post_ids = list(dict.fromkeys(post_id for _, post_id in keys))[:limit]
+    posts = Post.objects.select_related('author').with_liked_by(user).in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
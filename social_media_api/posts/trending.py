@@ -0,0 +1,218 @@
+"""
+Trending posts, scored incrementally from like and comment events.
+
+Each event adds weight * 2^(-age / TRENDING_HALF_LIFE) to its post's score.
+Scores are kept as logs relative to a fixed EPOCH: an event at time t adds
+log(weight) + rate * (t - EPOCH) (log-sum-exp), so a score never has to be
+decayed in place and only ever grows. Ranking by the stored value is the same
+as ranking by the decayed one, which is what lets a bounded min-heap of the
+best TRENDING_SIZE posts stay correct with O(log K) work per event: a post
+only moves when one of its own events arrives.
+
+Each process keeps its own engine. Every TRENDING_SNAPSHOT_INTERVAL seconds it
+merges the score it added since its last snapshot into posts_trendingpost with
+a log-sum-exp upsert, so snapshots from several processes add up instead of
+overwriting each other, and each event is counted once. The engine reloads the
+merged table at the same interval, so every process serves the combined
+ranking (plus its own events since), and a restart loses at most one interval
+of events.
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Post, TrendingPost
+
+logger = logging.getLogger(__name__)
+
+EPOCH = 1_700_000_000  # Fixed origin so scores are comparable across processes and restarts.
+WEIGHTS = {'like': 1.0, 'comment': 3.0}
+# Posts outside the top K whose score falls this far (in log units) below the
+# K-th best are dropped from the table at snapshot time; ~1/1000th of the cut-off.
+PRUNE_MARGIN = math.log(1000)
+# Adds a process's new score to the stored one: log(e^a + e^b), computed stably.
+MERGE_SQL = (
+    'INSERT INTO {table} (post_id, log_score, rank, snapshot_at) VALUES (%s, %s, 0, %s) '
+    'ON CONFLICT (post_id) DO UPDATE SET '
+    'log_score = MAX(log_score, excluded.log_score) '
+    '+ LN(1 + EXP(MIN(log_score, excluded.log_score) - MAX(log_score, excluded.log_score))), '
+    'snapshot_at = excluded.snapshot_at'
+)
+
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+class TrendingEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # Serializes loads and snapshots.
+        self._scores = {}   # post_id -> log score, for every post still being tracked
+        self._top = {}      # post_id -> log score, the current top K
+        self._heap = []     # (log score, post_id) min-heap over _top; superseded entries are skipped
+        self._pending = {}  # post_id -> log score added since the last snapshot
+        self._loaded_at = None
+        self._snapshotter = None
+
+    @property
+    def size(self):
+        return getattr(settings, 'TRENDING_SIZE', 100)
+
+    @property
+    def rate(self):
+        return math.log(2) / getattr(settings, 'TRENDING_HALF_LIFE', 6 * 60 * 60)
+
+    @property
+    def snapshot_interval(self):
+        return getattr(settings, 'TRENDING_SNAPSHOT_INTERVAL', 60)
+
+    def record(self, post_id, kind):
+        """Count a 'like' or 'comment' on `post_id` once the surrounding transaction commits."""
+        transaction.on_commit(lambda: self._record(post_id, WEIGHTS[kind], time.time()))
+
+    def _record(self, post_id, weight, at):
+        self._ensure_loaded()
+        increment = math.log(weight) + self.rate * (at - EPOCH)
+        with self._lock:
+            self._pending[post_id] = _logaddexp(self._pending.get(post_id), increment)
+            score = _logaddexp(self._scores.get(post_id), increment)
+            self._scores[post_id] = score
+            self._offer(post_id, score)
+            start = self._snapshotter is None and self.snapshot_interval > 0
+            if start:
+                self._snapshotter = threading.Thread(target=self._run, name='trending', daemon=True)
+        if start:
+            self._snapshotter.start()
+
+    def _offer(self, post_id, score):
+        if post_id not in self._top and len(self._top) >= self.size:
+            if score <= self._min_score():
+                return
+            _, evicted = heapq.heappop(self._heap)
+            del self._top[evicted]
+        self._top[post_id] = score
+        heapq.heappush(self._heap, (score, post_id))
+        if len(self._heap) > 4 * self.size:
+            self._heap = [(s, pk) for pk, s in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _min_score(self):
+        # Drop entries superseded by a later push until the head is live.
+        while self._heap:
+            score, post_id = self._heap[0]
+            if self._top.get(post_id) == score:
+                return score
+            heapq.heappop(self._heap)
+        return None
+
+    def top(self, limit=None, now=None):
+        """[(post_id, decayed score)] for the best posts, best first, in O(K log K)."""
+        self._ensure_loaded()
+        shift = self.rate * ((now or time.time()) - EPOCH)
+        with self._lock:
+            ranking = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return [(post_id, math.exp(score - shift)) for post_id, score in ranking[:limit]]
+
+    def _ensure_loaded(self):
+        """(Re)load the merged table once per snapshot interval (once, if snapshots are off)."""
+        interval = self.snapshot_interval
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (interval <= 0 or time.monotonic() - loaded_at < interval):
+            return
+        with self._sync_lock:
+            if self._loaded_at is loaded_at:
+                self._load()
+
+    def _load(self):
+        # Table scores plus this process's events not yet merged into them.
+        rows = list(TrendingPost.objects.values_list('post_id', 'log_score'))
+        with self._lock:
+            scores = dict(rows)
+            for post_id, delta in self._pending.items():
+                scores[post_id] = _logaddexp(scores.get(post_id), delta)
+            self._scores, self._top, self._heap = scores, {}, []
+            for post_id, score in scores.items():
+                self._offer(post_id, score)
+            self._loaded_at = time.monotonic()
+
+    def snapshot(self):
+        """Merge the events since the last snapshot into posts_trendingpost and reload it."""
+        with self._sync_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                self._merge(pending)
+            except Exception:
+                with self._lock:  # Keep them for the next attempt.
+                    for post_id, delta in pending.items():
+                        self._pending[post_id] = _logaddexp(self._pending.get(post_id), delta)
+                raise
+            self._load()
+
+    def _merge(self, pending):
+        live = set(Post.objects.filter(pk__in=list(pending)).values_list('pk', flat=True))
+        now = timezone.now()
+        sql = MERGE_SQL.format(table=connection.ops.quote_name(TrendingPost._meta.db_table))
+        with transaction.atomic():
+            with connection.cursor() as c:
+                c.executemany(sql, [(pk, delta, now) for pk, delta in pending.items() if pk in live])
+            ranking = list(TrendingPost.objects.order_by('-log_score', 'post_id').values_list('post_id', 'log_score'))
+            if len(ranking) > self.size:
+                cutoff = ranking[self.size - 1][1] - PRUNE_MARGIN
+                TrendingPost.objects.filter(log_score__lt=cutoff).delete()
+                ranking = [(pk, score) for pk, score in ranking if score >= cutoff]
+            TrendingPost.objects.bulk_update(
+                [TrendingPost(post_id=pk, rank=rank) for rank, (pk, _) in enumerate(ranking, 1)], ['rank'])
+
+    def forget(self, post_id):
+        """Stop tracking a deleted post."""
+        self.forget_many([post_id])
+
+    def forget_many(self, post_ids):
+        """Stop tracking deleted or archived posts, refilling the top K from the others."""
+        with self._lock:
+            for post_id in post_ids:
+                self._forget(post_id)
+            self._refill()
+
+    def _forget(self, post_id):
+        self._scores.pop(post_id, None)
+        self._pending.pop(post_id, None)
+        self._top.pop(post_id, None)
+
+    def _refill(self):
+        free = self.size - len(self._top)
+        if free > 0:
+            candidates = ((score, pk) for pk, score in self._scores.items() if pk not in self._top)
+            for score, post_id in heapq.nlargest(free, candidates):
+                self._offer(post_id, score)
+
+    def reset(self):
+        with self._lock:
+            self._scores, self._top, self._heap, self._pending = {}, {}, [], {}
+            self._loaded_at = None
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.snapshot_interval, 1))
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Snapshotting trending posts failed")
+            finally:
+                close_old_connections()
+
+
+trending_engine = TrendingEngine()
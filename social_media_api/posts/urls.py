@@ -1,2 +1,35 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import (CommentViewSet, FeedView, LikePostView, PostCommentsView, PostSearchView, PostViewSet,
+                    TrendingPostsView, UnlikePostView, UserPostsView)
+
 ["feed/"]
-["<int:pk>/like/", "<int:pk>/unlike/"]
\ No newline at end of file
+["<int:pk>/like/", "<int:pk>/unlike/"]
+
+router = SimpleRouter()
+router.register('comments', CommentViewSet, basename='comment')
+router.register('', PostViewSet, basename='post')
+
+urlpatterns = [
+    # Home feed of followed users' posts
+    path('feed/', FeedView.as_view(), name='feed'),
+
+    # Full-text search over titles and content
+    path('search/', PostSearchView.as_view(), name='post-search'),
+
+    # Most engaged-with posts, time-decayed
+    path('trending/', TrendingPostsView.as_view(), name='trending'),
+
+    # Posts by one user
+    path('users/<int:user_id>/', UserPostsView.as_view(), name='user-posts'),
+
+    # Comments on one post (list / create)
+    path('<int:pk>/comments/', PostCommentsView.as_view(), name='post-comments'),
+
+    # Like / unlike a post
+    path('<int:pk>/like/', LikePostView.as_view(), name='like-post'),
+    path('<int:pk>/unlike/', UnlikePostView.as_view(), name='unlike-post'),
+
+    path('', include(router.urls)),
+]
@@ -1,9 +1,200 @@
-from django.shortcuts import render
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404, render
+from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from social_media_api.pagination import KeysetPagination
+
+from .models import Comment, Like, Post, latest_comments
+from .permissions import IsAuthorOrReadOnly
+from .search import search_posts
+from .trending import trending_engine
+from .serializers import CommentSerializer, ExpandedCommentSerializer, ExpandedPostSerializer, PostSerializer
+from .timeline import read_timeline
 
 ["viewsets", "viewsets.ModelViewSet", "Comment.objects.all()", "Post.objects.all()"]
 # Create your views here.
 
+
+class ExpandMixin:
+    """
+    `?expand=1` on a read swaps in `expanded_serializer_class`, which embeds
+    related objects instead of bare ids.
+    """
+    expand_query_param = 'expand'
+    expanded_serializer_class = None
+
+    def is_expanded(self):
+        request = self.request
+        return (request.method in permissions.SAFE_METHODS
+                and request.query_params.get(self.expand_query_param) in ('1', 'true'))
+
+    def get_serializer_class(self):
+        if self.is_expanded():
+            return self.expanded_serializer_class
+        return self.serializer_class
+
+
+class PostViewSet(ExpandMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all()
+    serializer_class = PostSerializer
+    expanded_serializer_class = ExpandedPostSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        queryset = Post.objects.with_liked_by(self.request.user)
+        return queryset.expanded() if self.is_expanded() else queryset
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+
+
+class UserPostsView(ExpandMixin, generics.ListAPIView):
+    """Posts by one user, newest first."""
+    serializer_class = PostSerializer
+    expanded_serializer_class = ExpandedPostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(author_id=self.kwargs['user_id']).with_liked_by(self.request.user)
+        return queryset.expanded() if self.is_expanded() else queryset
+
+
+class PostCommentsView(ExpandMixin, generics.ListCreateAPIView):
+    """Top-level comments on one post, oldest first; POST adds a comment or, with `parent`, a reply."""
+    serializer_class = CommentSerializer
+    expanded_serializer_class = ExpandedCommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(post_id=self.kwargs['pk']).top_level().with_reply_count()
+        return queryset.select_related('author') if self.is_expanded() else queryset
+
+    def perform_create(self, serializer):
+        post = get_object_or_404(Post, pk=self.kwargs['pk'])
+        parent = serializer.validated_data.get('parent')
+        if parent is not None and parent.post_id != post.pk:
+            raise ValidationError({'parent': ["Replies must be on the same post as their parent."]})
+        serializer.save(author=self.request.user, post=post)
+
+
+class CommentViewSet(ExpandMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin, mixins.DestroyModelMixin,
+                     viewsets.GenericViewSet):
+    queryset = Comment.objects.select_related('author').with_reply_count()
+    serializer_class = CommentSerializer
+    expanded_serializer_class = ExpandedCommentSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('path',)
+
+    @action(detail=True)
+    def thread(self, request, pk=None):
+        """The comment and every reply beneath it, depth-first, as one path range per page."""
+        comment = self.get_object()
+        queryset = Comment.objects.subtree(comment).with_reply_count()
+        if self.is_expanded():
+            queryset = queryset.select_related('author')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 ["Post.objects.filter(author__in=following_users).order_by"
  "following.all()"
  "permissions.IsAuthenticated"]
-["generics.get_object_or_404(Post, pk=pk)", "Like.objects.get_or_create(user=request.user, post=post)", "Notification.objects.create"]
\ No newline at end of file
+["generics.get_object_or_404(Post, pk=pk)", "Like.objects.get_or_create(user=request.user, post=post)", "Notification.objects.create"]
+
+
+class LikePostView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        post = generics.get_object_or_404(Post, pk=pk)
+        _, created = Like.objects.get_or_create(user=request.user, post=post)
+        if not created:
+            return Response({"message": "You already like this post."}, status=status.HTTP_200_OK)
+        return Response({"message": "You liked {}".format(post.title)}, status=status.HTTP_201_CREATED)
+
+
+class UnlikePostView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        post = generics.get_object_or_404(Post, pk=pk)
+        deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+        if not deleted:
+            return Response({"error": "You have not liked this post."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "You unliked {}".format(post.title)}, status=status.HTTP_200_OK)
+
+
+class FeedView(ExpandMixin, APIView):
+    """Home feed: posts by the users the current user follows (and their own), newest first."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    serializer_class = PostSerializer
+    expanded_serializer_class = ExpandedPostSerializer
+
+    def get(self, request):
+        paginator = self.pagination_class()
+        before = paginator.read_cursor(request, Post, ('-created_at', '-id'))
+        posts = read_timeline(request.user, paginator.page_size + 1, before)
+        page = paginator.paginate_list(posts, request, key=lambda post: (post.created_at, post.id))
+        if self.is_expanded():
+            # Authors already come from read_timeline's select_related.
+            prefetch_related_objects(page, latest_comments())
+        serializer = self.get_serializer_class()(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class PostSearchView(APIView):
+    """
+    Full-text search over post titles and content, best match first. Each result
+    carries `title_highlight` and a `snippet` of the content with matches in <mark>.
+    GET /posts/search/?q=django&cursor=<next from the previous page>
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            hits, next_cursor = search_posts(query, cursor=request.query_params.get('cursor'),
+                                             limit=self.page_size)
+        except ValueError:
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        posts = Post.objects.with_liked_by(request.user).in_bulk([post_id for post_id, _, _ in hits])
+        results = []
+        for post_id, title_highlight, snippet in hits:
+            if post_id in posts:
+                data = PostSerializer(posts[post_id], context={'request': request}).data
+                results.append(dict(data, title_highlight=title_highlight, snippet=snippet))
+        return Response({"results": results, "next": next_cursor}, status=status.HTTP_200_OK)
+
+
+class TrendingPostsView(APIView):
+    """
+    The hottest posts right now, best first, served from the in-memory
+    trending engine (posts.trending): one query for the posts, none for ranking.
+    GET /posts/trending/?limit=20
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), trending_engine.size)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        ranking = trending_engine.top(limit=max(limit, 0))
+        posts = Post.objects.with_liked_by(request.user).in_bulk([post_id for post_id, _ in ranking])
+        results = [dict(PostSerializer(posts[post_id], context={'request': request}).data, trending_score=score)
+                   for post_id, score in ranking if post_id in posts]
+        return Response({"results": results}, status=status.HTTP_200_OK)
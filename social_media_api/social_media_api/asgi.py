@@ -2,6 +2,10 @@
 ASGI config for social_media_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with an ASGI server (e.g. ``uvicorn social_media_api.asgi:application``)
+to serve /notifications/stream/: each open event stream is then a suspended
+coroutine rather than a blocked thread. Notifications saved by the job workers
+reach the streams through the sockets in NOTIFICATION_BROKER_DIR.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,82 @@
+"""
+Shared helpers for the SQLite FTS5 search indexes (accounts, posts).
+
+Each index is an FTS5 virtual table whose rowid is the primary key of the row it
+mirrors. Results are ranked with bm25() (lower is better) and paginated by
+keyset on (score, rowid), carried between pages in an opaque cursor.
+"""
+import base64
+import json
+import re
+
+from django.db import connection
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query, prefix=True):
+    """
+    Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS5 operators in the input are inert) and, with
+    `prefix`, turned into a prefix query: 'ali smi' -> '"ali"* "smi"*'.
+    """
+    words = _TOKEN_RE.findall(query)
+    suffix = '*' if prefix else ''
+    return ' '.join(f'"{word}"{suffix}' for word in words)
+
+
+def encode_cursor(score, rowid):
+    raw = json.dumps([score, rowid]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (score, rowid) from a cursor, or raise ValueError."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, rowid = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), int(rowid)
+    except (TypeError, ValueError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def ranked_search(table, query, weights=(), columns=(), cursor=None, limit=20):
+    """
+    Run a ranked MATCH against `table` and return ([(rowid, score, *columns)], next_cursor).
+
+    `columns` are extra SQL expressions selected alongside each hit, e.g. a
+    snippet() call. The page is read with a keyset condition on (score, rowid),
+    so later pages cost the same as the first.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return [], None
+
+    bm25_args = ''.join(f', {float(w)}' for w in weights)
+    inner_columns = ''.join(f', {column} AS c{i}' for i, column in enumerate(columns))
+    outer_columns = ''.join(f', c{i}' for i in range(len(columns)))
+    sql = (f'SELECT rowid, score{outer_columns} FROM ('
+           f'SELECT rowid, bm25({table}{bm25_args}) AS score{inner_columns} '
+           f'FROM {table} WHERE {table} MATCH %s)')
+    params = [expression]
+    if cursor is not None:
+        score, rowid = decode_cursor(cursor)
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [score, score, rowid]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    params.append(limit + 1)
+
+    with connection.cursor() as c:
+        c.execute(sql, params)
+        rows = c.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return rows, next_cursor
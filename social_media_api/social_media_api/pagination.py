@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination over a composite (timestamp, id) ordering.
+
+Instead of OFFSET, each page is fetched with a seek condition such as
+
+    created_at <= :t AND (created_at < :t OR (created_at = :t AND id < :id))
+
+The redundant bound on the leading column, outside the OR, is what lets a
+composite index on (..., created_at, id) be entered as a range at the cursor
+rather than scanned from the start, so page 1000 costs the same as page 1. The position is handed to clients as an
+opaque base64 cursor.
+"""
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    cursor_query_param = 'cursor'
+    # Default ordering; views override it with a `keyset_ordering` attribute.
+    ordering = ('-created_at', '-id')
+
+    def __init__(self):
+        self.next_cursor = None
+        self.request = None
+
+    def get_ordering(self, view):
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def encode_cursor(self, values):
+        # Full-precision isoformat: DjangoJSONEncoder would round to milliseconds
+        # and break the equality half of the seek condition.
+        values = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+        raw = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def read_cursor(self, request, model, ordering):
+        """Return the cursor's position as a tuple of field values, or None on page one."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            fields = [model._meta.get_field(name.lstrip('-')) for name in ordering]
+            if len(values) != len(fields):
+                raise ValueError
+            return tuple(field.to_python(value) for field, value in zip(fields, values))
+        except Exception:
+            raise NotFound("Invalid cursor")
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """Q() selecting the rows strictly after `position` in `ordering`."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        if len(ordering) > 1:
+            # Range on the leading column the index can seek to; the OR alone can't be.
+            first = ordering[0]
+            lookup = 'lte' if first.startswith('-') else 'gte'
+            condition = Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
+        return condition
+
+    def paginate_list(self, items, request, key):
+        """Cut a list fetched with limit page_size + 1 into a page and remember the next cursor."""
+        self.request = request
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            self.next_cursor = self.encode_cursor(key(items[-1]))
+        return items
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(view)
+        position = self.read_cursor(request, queryset.model, ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+        items = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        fields = [name.lstrip('-') for name in ordering]
+        return self.paginate_list(items, request, key=lambda obj: [getattr(obj, f) for f in fields])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -40,7 +40,9 @@ INSTALLED_APPS = [
     'rest_framework',
     'accounts',
     'rest_framework.authtoken',
-    #'posts',
+    'posts',
+    'jobs',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -81,6 +83,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL lets long readers (account exports) and writers run side by side.
+        'OPTIONS': {'init_command': 'PRAGMA journal_mode=WAL;'},
     }
 }
 
@@ -121,6 +125,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# User uploads (profile pictures and their resized variants)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Square variants rendered off the request path by accounts.thumbnails.
+PROFILE_PICTURE_VARIANT_SIZES = (48, 96, 256)
+PROFILE_PICTURE_VARIANT_FORMAT = 'WEBP'  # falls back to JPEG if Pillow lacks WebP
+PROFILE_PICTURE_VARIANT_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -130,13 +143,104 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Runtime state private to this deployment (created mode 0700, owned by the
+# server's user): not a fixed path under the world-writable temp directory, where
+# another local user could create it first.
+VAR_DIR = BASE_DIR / 'var'
+
+# 'shared' is seen by every process on the host (web, ASGI and job workers), so
+# invalidations and counters made in one reach the others. It holds two entries
+# per cached token plus the unread counters and stream tickets; past MAX_ENTRIES
+# the file-based cache deletes entries at random, so keep it far above the number
+# of active users. It also lists its directory on every write: point it at Redis
+# or Memcached beyond a few tens of thousands of active users, or when the
+# processes run on more than one host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': VAR_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Token -> user lookups are cached by accounts.authentication.CachedTokenAuthentication
+# in the TOKEN_AUTH_CACHE_ALIAS cache. With None, each process keeps its own LRU of
+# TOKEN_AUTH_CACHE_MAX_SIZE entries, and a revoked token keeps working in the other
+# processes for up to TOKEN_AUTH_CACHE_TTL seconds: only use that with one worker.
+TOKEN_AUTH_CACHE_ALIAS = 'shared'
+TOKEN_AUTH_CACHE_MAX_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60  # seconds
+
+# Home feed (posts.timeline). Posts are fanned out to followers' timelines on write,
+# except for authors above FEED_FANOUT_MAX_FOLLOWERS, whose posts are pulled on read.
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_WORKERS = 2
+FEED_FANOUT_ASYNC = True  # False runs fan-out inline on commit (used by tests)
+FEED_BACKFILL_POSTS = 20  # latest posts copied into a timeline on follow
+
+# Post like/comment counters are buffered in memory and flushed as coalesced UPDATEs
+# every POST_COUNTER_FLUSH_INTERVAL seconds or POST_COUNTER_FLUSH_EVENTS events.
+# An interval of 0 writes each change straight through.
+POST_COUNTER_FLUSH_INTERVAL = 0.25
+POST_COUNTER_FLUSH_EVENTS = 500
+
+# Trending posts: likes and comments add time-decayed weight to a post's score;
+# each process keeps the best TRENDING_SIZE posts in memory, and every
+# TRENDING_SNAPSHOT_INTERVAL seconds (0 disables) merges its new events into
+# posts_trendingpost and reloads the combined ranking from it.
+TRENDING_SIZE = 100
+TRENDING_HALF_LIFE = 6 * 60 * 60  # seconds
+TRENDING_SNAPSHOT_INTERVAL = 60
+
+# `manage.py archive_posts` moves posts older than POST_ARCHIVE_AFTER_DAYS (with
+# their comments and likes) to the archive tables, POST_ARCHIVE_BATCH_SIZE posts
+# per transaction.
+POST_ARCHIVE_AFTER_DAYS = 365
+POST_ARCHIVE_BATCH_SIZE = 200
+
+# Background jobs (jobs app), run by `manage.py run_workers`. A failed job is
+# retried after JOBS_RETRY_BACKOFF * 2^(attempt - 1) seconds, up to
+# JOBS_MAX_ATTEMPTS attempts.
+JOBS_WORKERS = 4
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 5
+
+# Events with the same (recipient, verb, target) less than
+# NOTIFICATION_COALESCE_WINDOW seconds apart fold into one unread notification
+# that remembers the NOTIFICATION_RECENT_ACTORS latest actors.
+NOTIFICATION_COALESCE_WINDOW = 60 * 60
+NOTIFICATION_RECENT_ACTORS = 3
+
+# Unread badge counters live in this CACHES alias, which must be shared between
+# web and job workers (not LocMemCache), and are recounted from the database
+# after the TTL.
+NOTIFICATION_UNREAD_CACHE_ALIAS = 'shared'
+NOTIFICATION_UNREAD_CACHE_TTL = 300  # seconds
+
+# Live notifications (/notifications/stream/, served under ASGI). Notifications
+# are saved by the job workers and relayed to the processes holding the streams
+# through Unix sockets in NOTIFICATION_BROKER_DIR (see notifications.hub), which
+# must be reachable by every web and job worker on the host, private to the user
+# they run as, and short (socket paths are limited to about 100 bytes). Browsers
+# open the stream with a single-use ticket that expires after
+# NOTIFICATION_STREAM_TICKET_TTL.
+NOTIFICATION_BROKER_DIR = VAR_DIR / 'broker'
+NOTIFICATION_STREAM_KEEPALIVE = 15  # seconds
+NOTIFICATION_STREAM_TICKET_CACHE_ALIAS = 'shared'
+NOTIFICATION_STREAM_TICKET_TTL = 30  # seconds
+NOTIFICATION_STREAM_QUEUE_SIZE = 100
+
 ["SECURE_BROWSER_XSS_FILTER", "X_FRAME_OPTIONS", "SECURE_SSL_REDIRECT"]
 ["PORT"]
 ["STATIC_ROOT"]
\ No newline at end of file
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import include
 from django.conf import settings
 from django.urls import path
+from rest_framework.authtoken.views import obtain_auth_token
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,7 +26,6 @@ urlpatterns = [
     path('notifications/', include('notifications.urls')),
     path('posts/', include('posts.urls')),
     path('api-auth/', include('rest_framework.urls')),  # For browsable API authentication
-    path('api-token-auth/', include('rest_framework.authtoken.urls')),  # For token authentication
-    path('api/', include('api.urls')),  # Include API URLs
+    path('api-token-auth/', obtain_auth_token),  # For token authentication
 ]
 